@@ -1,32 +1,280 @@
-from fastapi import FastAPI, HTTPException
-import requests
+import json
+from contextlib import asynccontextmanager
+from typing import Iterable, List, Optional, Union
+
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from starlette.concurrency import run_in_threadpool
 
 from storage import blockchain
-from node.config import SEED_NODES, MY_NETWORK_ADDRESS, NODE_ADDRESS
-from models.api import SignedTransaction
+from node.config import (
+    SEED_NODES, MY_NETWORK_ADDRESS, NODE_ADDRESS, MAX_BLOCKS_PER_REQUEST,
+    MAX_TRANSACTIONS_PER_BATCH, MAX_BATCH_BYTES, GOSSIP_SEEN_SIZE, GOSSIP_SEEN_TTL,
+    RESPONSE_CACHE_SIZE, RESPONSE_CACHE_MAX_BYTES
+)
+from node import metrics
+from node.cache import (
+    CACHE_REQUESTS, JSON, HeadersCache, ResponseCache, etag_matches, json_bytes, make_etag, tip_key
+)
+from node.gossip import Gossip, SeenCache
+from node.peers import PeerClient
+from node.sync import resolve
+from models.api import Block, Inventory, MiningSubmission, SignedTransaction
+from models.encoding import encode_blocks
+from models.template import StaleTemplateError
+
+OCTET_STREAM = "application/octet-stream"
+NDJSON = "application/x-ndjson"
+
+# общий пул соединений к пирам для консенсуса и рассылки
+peers = PeerClient(node for node in SEED_NODES if node != MY_NETWORK_ADDRESS)
+gossip = Gossip(peers, MY_NETWORK_ADDRESS, SeenCache(GOSSIP_SEEN_SIZE, GOSSIP_SEEN_TTL))
+# готовые ответы читающих эндпоинтов для текущей вершины цепочки
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_MAX_BYTES)
+headers_cache = HeadersCache()
+
+
+# значения читаются в момент запроса /metrics
+metrics.gauge("node_chain_height", "Blocks in the local chain", function=lambda: len(blockchain.view()))
+metrics.gauge("node_mempool_size", "Transactions waiting in the mempool", function=lambda: len(blockchain.mempool))
+metrics.gauge("node_next_difficulty", "Difficulty of the next block", function=blockchain.next_difficulty)
+metrics.gauge("node_peers_available", "Peers not in backoff", function=lambda: len(peers.available_peers()))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await peers.aclose()
+
 
 app = FastAPI(
     title="Polinas Node",
-    version="0.3.0"
+    version="0.3.0",
+    lifespan=lifespan
 )
 
 
+# -------------------------
+# STREAMING
+# -------------------------
+
+def wants_binary(request: Request) -> bool:
+    # бинарный вариант ответа по заголовку Accept
+    return OCTET_STREAM in request.headers.get("accept", "")
+
+
+def wants_ndjson(request: Request, format: Optional[str]) -> bool:
+    return format == "ndjson" or NDJSON in request.headers.get("accept", "")
+
+
+def json_array_stream(items: Iterable):
+    # тот же JSON-массив, но элементы сериализуются по одному
+    yield b"["
+    for i, item in enumerate(items):
+        yield (b"," if i else b"") + item.model_dump_json().encode()
+    yield b"]"
+
+
+def ndjson_stream(items: Iterable):
+    for item in items:
+        yield item.model_dump_json().encode() + b"\n"
+
+
+def binary_stream(blocks: Iterable):
+    for block in blocks:
+        yield encode_blocks([block])
+
+
+STREAMS = {
+    OCTET_STREAM: binary_stream,
+    NDJSON: ndjson_stream,
+    JSON: json_array_stream,
+}
+
+
+def response_type(request: Request, format: Optional[str], binary: bool = False) -> str:
+    if binary and wants_binary(request):
+        return OCTET_STREAM
+    if wants_ndjson(request, format):
+        return NDJSON
+    return JSON
+
+
+def stream_items(request: Request, items: Iterable, format: Optional[str], headers: dict,
+                 binary: bool = False) -> StreamingResponse:
+    media_type = response_type(request, format, binary)
+    # тело зависит от Accept — общий кэш не должен отдавать его другому клиенту
+    headers["Vary"] = "Accept"
+    return StreamingResponse(STREAMS[media_type](items), media_type=media_type, headers=headers)
+
+
+def page_bounds(start: int, limit: Optional[int], total: int):
+    """Границы страницы и заголовок со следующим курсором, если данные остались"""
+    end = total if limit is None else min(start + limit, total)
+    headers = {"X-Next-Cursor": str(end)} if end < total else {}
+    return max(end - start, 0), headers
+
+
+# -------------------------
+# CACHING
+# -------------------------
+
+def not_modified(request: Request, headers: dict, endpoint: str) -> Optional[Response]:
+    """304, если у клиента уже есть ответ с этим ETag"""
+    if not etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return None
+    CACHE_REQUESTS.inc(endpoint=endpoint, result="not_modified")
+    return Response(status_code=304, headers=headers)
+
+
 # -------------------------
 # TRANSACTIONS
 # -------------------------
 
 @app.post("/transactions")
-def create_transaction(tx: SignedTransaction):
+def create_transaction(tx: SignedTransaction, background: BackgroundTasks):
     try:
         blockchain.add_transaction(tx)
-        return {"status": "ok", "message": "Transaction accepted"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    background.add_task(gossip.announce, "tx", tx.txid())
+    return {"status": "ok", "message": "Transaction accepted"}
+
+
+TRANSACTION_LIST = TypeAdapter(List[SignedTransaction])
+
+
+def check_batch_size(count: int):
+    if count > MAX_TRANSACTIONS_PER_BATCH:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_TRANSACTIONS_PER_BATCH} transactions per batch"
+        )
+
+
+async def read_batch_body(request: Request) -> bytes:
+    """Тело пакета с ограничением размера — до разбора JSON"""
+    too_large = HTTPException(status_code=413, detail=f"Batch body exceeds {MAX_BATCH_BYTES} bytes")
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > MAX_BATCH_BYTES:
+        raise too_large
+
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_BATCH_BYTES:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def validation_error(e: ValidationError) -> str:
+    details = "; ".join(
+        f"{'.'.join(map(str, err['loc']))}: {err['msg']}" if err["loc"] else err["msg"]
+        for err in e.errors()
+    )
+    return f"Invalid transaction: {details}"
+
+
+def parse_transactions(body: bytes, ndjson: bool) -> List[Union[SignedTransaction, str]]:
+    """
+    Транзакции пакета (JSON-массив или NDJSON); на месте
+    неразобранной транзакции — текст ошибки.
+    """
+    if ndjson:
+        lines = [line for line in body.splitlines() if line.strip()]
+        check_batch_size(len(lines))
+        items = []
+        for line in lines:
+            try:
+                items.append(SignedTransaction.model_validate_json(line))
+            except ValidationError as e:
+                items.append(validation_error(e))
+        return items
+
+    # весь массив разбирается за один проход; ошибки ищутся поэлементно
+    # только если пакет не прошёл целиком
+    try:
+        return TRANSACTION_LIST.validate_json(body)
+    except ValidationError:
+        pass
+
+    try:
+        raw = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(raw, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+
+    items = []
+    for item in raw:
+        try:
+            items.append(SignedTransaction.model_validate(item))
+        except ValidationError as e:
+            items.append(validation_error(e))
+    return items
+
+
+def admit_batch(body: bytes, ndjson: bool):
+    """Разбор и приём пакета; возвращает ответ и txid принятых транзакций"""
+    items = parse_transactions(body, ndjson)
+    check_batch_size(len(items))
+
+    txs = [item for item in items if isinstance(item, SignedTransaction)]
+    errors = iter(blockchain.add_transactions(txs))
+
+    results = []
+    accepted = []
+    for index, item in enumerate(items):
+        if not isinstance(item, SignedTransaction):
+            results.append({"index": index, "status": "rejected", "error": item})
+            continue
+        txid = item.txid()
+        error = next(errors)
+        if error is None:
+            accepted.append(txid)
+            results.append({"index": index, "txid": txid, "status": "ok"})
+        else:
+            results.append({"index": index, "txid": txid, "status": "rejected", "error": error})
+
+    return {
+        "accepted": len(accepted),
+        "rejected": len(items) - len(accepted),
+        "results": results
+    }, accepted
+
+
+@app.post("/transactions/batch")
+async def create_transactions(request: Request, background: BackgroundTasks):
+    """
+    Пакет транзакций одним запросом: приём по порядку,
+    результат — по каждой транзакции в том же порядке.
+    """
+    # тело читается в цикле событий, разбор и приём тысяч
+    # транзакций идут в пуле потоков и не держат другие запросы
+    body = await read_batch_body(request)
+    ndjson = NDJSON in request.headers.get("content-type", "")
+    response, accepted = await run_in_threadpool(admit_batch, body, ndjson)
+
+    if accepted:
+        background.add_task(gossip.announce_many, "tx", accepted)
+    return response
+
 
 @app.get("/transactions/pending")
-def pending_transactions():
-    return blockchain.mempool
+def pending_transactions(
+    request: Request,
+    start: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    format: Optional[str] = None
+):
+    mempool = blockchain.pending()
+    count, headers = page_bounds(start, limit, len(mempool))
+    items = mempool[start:start + count]
+    return stream_items(request, items, format, headers)
 
 
 # -------------------------
@@ -34,18 +282,171 @@ def pending_transactions():
 # -------------------------
 
 @app.post("/blocks/mine")
-def mine_block():
-    return blockchain.mine_block(NODE_ADDRESS)
+async def mine_block(background: BackgroundTasks):
+    # перебор nonce идёт в пуле процессов, event loop не блокируется
+    try:
+        block = await run_in_threadpool(blockchain.mine_block, NODE_ADDRESS)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    background.add_task(gossip.announce, "block", block.header.hash)
+    return block
+
+
+@app.get("/blocks/{block_hash}")
+def get_block(block_hash: str, request: Request, response: Response):
+    height = blockchain.find_block_height(block_hash)
+    try:
+        block = blockchain.view().block(height) if height is not None else None
+    except IndexError:
+        block = None  # отключён реорганизацией
+    if block is None or block.header.hash != block_hash:
+        raise HTTPException(status_code=404, detail="Block not found")
+
+    # тело зависит от Accept
+    if wants_binary(request):
+        return Response(encode_blocks([block]), media_type=OCTET_STREAM, headers={"Vary": "Accept"})
+    response.headers["Vary"] = "Accept"
+    return block
+
+
+@app.post("/blocks")
+async def receive_block(block: Block, background: BackgroundTasks):
+    # одиночный блок от пира проверяется относительно текущей вершины;
+    # виденным хеш становится только после подключения (announce)
+    if not await gossip.receive_block(blockchain, block):
+        raise HTTPException(status_code=400, detail="Block rejected")
+
+    background.add_task(gossip.announce, "block", block.header.hash)
+    return {"status": "ok", "length": len(blockchain.view())}
+
+
+@app.get("/mining/stats")
+def mining_stats():
+    stats = blockchain.last_mining_stats
+    result = stats.to_dict() if stats else {}
+    result["next_difficulty"] = blockchain.next_difficulty()
+    return result
+
+
+@app.get("/mining/template")
+def mining_template(address: str = NODE_ADDRESS):
+    return blockchain.mining_template(address)
+
+
+@app.post("/mining/submit")
+async def mining_submit(submission: MiningSubmission, background: BackgroundTasks):
+    try:
+        block = await run_in_threadpool(
+            blockchain.submit_block, submission.template_id, submission.nonce
+        )
+    except StaleTemplateError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    background.add_task(gossip.announce, "block", block.header.hash)
+    return block
 
 
 @app.get("/chain")
-def get_chain():
-    return blockchain.chain
+def get_chain(
+    request: Request,
+    start: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    format: Optional[str] = None
+):
+    view = blockchain.view()
+    count, headers = page_bounds(start, limit, len(view))
+    if count > MAX_BLOCKS_PER_REQUEST:
+        # длинный диапазон сериализуется по одному блоку, полный список
+        # в памяти не собирается; без ETag — поток может оборваться
+        # реорганизацией, и обрезанный ответ не должен закэшироваться у клиента
+        blocks = view.blocks(start, start + count)
+        return stream_items(request, blocks, format, headers, binary=True)
+
+    media_type = response_type(request, format, binary=True)
+    tip = tip_key(view)
+    key = ("chain", start, count, media_type)
+    headers["Vary"] = "Accept"
+    headers["ETag"] = make_etag(tip, key)
+    response = not_modified(request, headers, "chain")
+    if response is not None:
+        return response
+
+    body = response_cache.get(tip, key)
+    if body is None:
+        blocks = list(view.blocks(start, start + count))
+        body = b"".join(STREAMS[media_type](blocks))
+        if len(blocks) == count:
+            response_cache.put(tip, key, body)
+        else:
+            # хвост отключён реорганизацией — ответ обрезан, не кэшируется
+            del headers["ETag"]
+    return Response(body, media_type=media_type, headers=headers)
 
 
 @app.get("/chain/headers")
-def get_chain_headers():
-    return blockchain.get_headers()
+def get_chain_headers(request: Request):
+    # пиры опрашивают заголовки постоянно: готовый JSON
+    # дописывается только новыми заголовками
+    view = blockchain.view()
+    headers = {"ETag": make_etag(tip_key(view), ("headers",))}
+    response = not_modified(request, headers, "headers")
+    if response is not None:
+        return response
+    return Response(headers_cache.render(view), media_type=JSON, headers=headers)
+
+
+@app.get("/blocks")
+def get_blocks(
+    request: Request,
+    response: Response,
+    start: int = Query(0, alias="from", ge=0),
+    end: Optional[int] = Query(None, alias="to", ge=0)
+):
+    # диапазон [from, to) с ограничением на размер ответа
+    view = blockchain.view()
+    end = min(
+        len(view) if end is None else end,
+        start + MAX_BLOCKS_PER_REQUEST,
+        len(view)
+    )
+    blocks = list(view.blocks(start, end))
+    # тело зависит от Accept
+    if wants_binary(request):
+        return Response(encode_blocks(blocks), media_type=OCTET_STREAM, headers={"Vary": "Accept"})
+    response.headers["Vary"] = "Accept"
+    return blocks
+
+
+@app.get("/tx/{txid}")
+def get_transaction(txid: str):
+    view = blockchain.view()
+    found = blockchain.find_transaction(txid)
+    if found is not None and found[0] < len(view):
+        height, position, tx = found
+        return {
+            "txid": txid,
+            "status": "confirmed",
+            "height": height,
+            "position": position,
+            "block_hash": view.headers[height].hash,
+            "confirmations": len(view) - height,
+            "transaction": tx
+        }
+
+    tx = blockchain.mempool.get(txid)
+    if tx is not None:
+        return {"txid": txid, "status": "pending", "transaction": tx}
+
+    raise HTTPException(status_code=404, detail="Transaction not found")
+
+
+@app.get("/tx/{txid}/proof")
+def get_transaction_proof(txid: str):
+    proof = blockchain.get_transaction_proof(txid)
+    if proof is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return proof
 
 
 # -------------------------
@@ -53,10 +454,55 @@ def get_chain_headers():
 # -------------------------
 
 @app.get("/balance/{address}")
-def get_balance(address: str):
+def get_balance(address: str, request: Request):
+    key = ("balance", address)
+    view = blockchain.view()
+    tip = tip_key(view)
+    headers = {"ETag": make_etag(tip, key)}
+    response = not_modified(request, headers, "balance")
+    if response is not None:
+        return response
+
+    body = response_cache.get(tip, key)
+    if body is None:
+        balance = view.balance(address)
+        if balance is None:
+            # блок уже применён к состоянию, но срез ещё не обновлён —
+            # ответ без ETag и мимо кэша
+            body = json_bytes({"address": address, "balance": blockchain.get_balance(address)})
+            return Response(body, media_type=JSON)
+        body = json_bytes({"address": address, "balance": balance})
+        response_cache.put(tip, key, body)
+    return Response(body, media_type=JSON, headers=headers)
+
+
+@app.get("/address/{address}/transactions")
+def get_address_transactions(
+    address: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500)
+):
+    # строки блоков, подключённых после создания среза, не учитываются
+    view = blockchain.view()
+    items = []
+    for txid, height, position in blockchain.storage.address_transactions(address, offset, limit, len(view)):
+        try:
+            block = view.block(height)
+        except IndexError:
+            continue  # блок отключён реорганизацией
+        items.append({
+            "txid": txid,
+            "height": height,
+            "position": position,
+            "transaction": block.transactions[position]
+        })
+
     return {
         "address": address,
-        "balance": blockchain.get_balance(address)
+        "offset": offset,
+        "limit": limit,
+        "total": blockchain.storage.address_transaction_count(address, len(view)),
+        "transactions": items
     }
 
 
@@ -65,50 +511,72 @@ def get_balance(address: str):
 # -------------------------
 
 @app.post("/nodes/resolve")
-def resolve_nodes():
-    max_length = len(blockchain.chain)
-    new_chain = None
-
-    for node in SEED_NODES:
-        if node == MY_NETWORK_ADDRESS:
-            continue
-
-        try:
-            headers_resp = requests.get(
-                f"http://{node}/chain/headers",
-                timeout=3
-            )
-            if headers_resp.status_code != 200:
-                continue
-
-            foreign_headers = headers_resp.json()
-            foreign_length = len(foreign_headers)
-
-            if foreign_length > max_length:
-                chain_resp = requests.get(
-                    f"http://{node}/chain",
-                    timeout=5
-                )
-                if chain_resp.status_code != 200:
-                    continue
-
-                candidate_chain = chain_resp.json()
-
-                if blockchain.is_chain_valid(candidate_chain):
-                    max_length = foreign_length
-                    new_chain = candidate_chain
-
-        except Exception:
-            continue
-
-    if new_chain:
-        blockchain.replace_chain(new_chain)
+async def resolve_nodes():
+    if await resolve(blockchain, peers):
         return {
             "replaced": True,
-            "new_length": len(blockchain.chain)
+            "new_length": len(blockchain.view())
         }
 
     return {
         "replaced": False,
-        "length": len(blockchain.chain)
+        "length": len(blockchain.view())
+    }
+
+
+@app.get("/nodes")
+def list_nodes():
+    return peers.peer_stats()
+
+
+# -------------------------
+# GOSSIP
+# -------------------------
+
+@app.post("/gossip/inv")
+def gossip_inventory(inv: Inventory, background: BackgroundTasks):
+    # объект забирается у объявившего узла уже после ответа,
+    # и только если это известный пир
+    if inv.origin not in peers.peers:
+        raise HTTPException(status_code=403, detail="Unknown origin")
+    hashes = [item_hash for item_hash in inv.all_hashes() if item_hash not in gossip.seen]
+    if hashes:
+        background.add_task(gossip.handle_inv, blockchain, inv.kind, hashes, inv.origin)
+    return {"status": "ok"}
+
+
+@app.get("/gossip/tx/{txid}")
+def gossip_transaction(txid: str):
+    tx = blockchain.mempool.get(txid)
+    if tx is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return tx
+
+
+@app.get("/gossip/block/{block_hash}")
+def gossip_block(block_hash: str, request: Request):
+    return get_block(block_hash, request)
+
+
+# -------------------------
+# ADMIN
+# -------------------------
+
+@app.post("/admin/snapshot")
+def create_snapshot():
+    snapshot = blockchain.save_snapshot()
+    return {
+        "height": snapshot["height"],
+        "tip_hash": snapshot["tip_hash"],
+        "addresses": len(snapshot["balances"]),
+        "mempool": len(snapshot["mempool"])
     }
+
+
+# -------------------------
+# METRICS
+# -------------------------
+
+@app.get("/metrics")
+def get_metrics():
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1 @@
+"""Бенчмарки узла: python -m bench --help"""
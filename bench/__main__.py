@@ -0,0 +1,4 @@
+from bench.suite import main
+
+if __name__ == "__main__":
+    main()
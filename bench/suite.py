@@ -0,0 +1,313 @@
+"""
+Бенчмарки горячих путей узла на синтетической цепочке.
+
+Запуск (каждый прогон — в своём временном каталоге данных):
+    python -m bench                                # результаты JSON в stdout
+    python -m bench --blocks 500 --output new.json
+    python -m bench --compare base.json            # сравнить с прошлым прогоном
+
+У каждого результата есть value, unit и better ("lower"/"higher");
+--compare печатает изменения и завершается с кодом 1, если какой-то
+результат ухудшился больше чем на --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+
+def _measure(fn: Callable[[], object], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "mean": statistics.fmean(ordered),
+        "samples": len(ordered),
+    }
+
+
+def _result(value: float, unit: str, better: str, **details) -> dict:
+    return {"value": value, "unit": unit, "better": better, **details}
+
+
+# -------------------------
+# БЕНЧМАРКИ
+# -------------------------
+
+def bench_merkle(transactions, repeat: int) -> dict:
+    from models.merkle import calculate_merkle_root
+
+    samples = _measure(lambda: calculate_merkle_root(transactions), repeat)
+    summary = _summary(samples)
+    return _result(summary["median"], "s", "lower", leaves=len(transactions), **summary)
+
+
+def bench_add_transaction(blockchain, transactions) -> dict:
+    accepted = 0
+    started = time.perf_counter()
+    for tx in transactions:
+        try:
+            blockchain.add_transaction(tx)
+            accepted += 1
+        except ValueError:
+            pass
+    elapsed = time.perf_counter() - started
+    return _result(len(transactions) / elapsed, "tx/s", "higher",
+                   transactions=len(transactions), accepted=accepted, seconds=elapsed)
+
+
+def bench_add_transactions(blockchain, transactions) -> dict:
+    """Тот же приём одним пакетом (POST /transactions/batch)"""
+    started = time.perf_counter()
+    errors = blockchain.add_transactions(transactions)
+    elapsed = time.perf_counter() - started
+    return _result(len(transactions) / elapsed, "tx/s", "higher",
+                   transactions=len(transactions), accepted=errors.count(None), seconds=elapsed)
+
+
+def bench_get_balance(blockchain, addresses, lookups: int, rng: random.Random) -> dict:
+    sample = [rng.choice(addresses) for _ in range(lookups)]
+    samples = []
+    for address in sample:
+        started = time.perf_counter()
+        blockchain.get_balance(address)
+        samples.append(time.perf_counter() - started)
+    summary = _summary(samples)
+    return _result(summary["median"], "s", "lower", **summary)
+
+
+def bench_hashrate(difficulty: int, workers: int, rounds: int, rng: random.Random) -> dict:
+    from node.miner import mine_header
+
+    # пул процессов запускается до замера
+    mine_header(b"warmup", 1, workers=workers)
+    hashes = 0
+    elapsed = 0.0
+    for _ in range(rounds):
+        prefix = rng.getrandbits(8 * 120).to_bytes(120, "big")
+        result = mine_header(prefix, difficulty, workers=workers)
+        hashes += result.hashes
+        elapsed += result.elapsed
+    return _result(hashes / elapsed, "H/s", "higher",
+                   difficulty=difficulty, workers=workers, rounds=rounds,
+                   hashes=hashes, seconds=elapsed)
+
+
+def bench_mine_block(blockchain, miner_address: str) -> dict:
+    """Сборка шаблона из мемпула, перебор nonce и подключение блока"""
+    pending = len(blockchain.mempool)
+    started = time.perf_counter()
+    block = blockchain.mine_block(miner_address)
+    elapsed = time.perf_counter() - started
+    return _result(elapsed, "s", "lower",
+                   transactions=len(block.transactions), mempool=pending)
+
+
+def bench_storage(blockchain, directory: str, backend: str) -> Dict[str, dict]:
+    """Запись цепочки поблочно в новое хранилище и запуск узла поверх него"""
+    from bench.workload import open_storage_at
+    from models.core import Blockchain
+
+    blocks = list(blockchain.storage.iter_blocks())
+    storage = open_storage_at(directory, backend)
+    started = time.perf_counter()
+    for height, block in enumerate(blocks):
+        storage.connect_block(height, block)
+    write = time.perf_counter() - started
+    storage.close()
+
+    storage = open_storage_at(directory, backend)
+    started = time.perf_counter()
+    Blockchain(storage=storage)
+    load = time.perf_counter() - started
+    storage.close()
+
+    return {
+        "storage_write": _result(len(blocks) / write, "blocks/s", "higher",
+                                 blocks=len(blocks), seconds=write, backend=backend),
+        "storage_load": _result(load, "s", "lower", blocks=len(blocks), backend=backend),
+    }
+
+
+def bench_validation(blockchain, workers: int, repeat: int) -> dict:
+    from models.validator import ChainValidator
+
+    blocks = list(blockchain.storage.iter_blocks())
+
+    def validate():
+        # новый валидатор — без памяти о проверенных блоках
+        validator = ChainValidator(
+            retarget_interval=blockchain.validator.retarget_interval,
+            target_block_time=blockchain.validator.target_block_time,
+            initial_difficulty=blockchain.validator.initial_difficulty,
+            workers=workers
+        )
+        try:
+            if not validator.validate_chain(blocks):
+                raise RuntimeError("synthetic chain failed validation")
+        finally:
+            validator.shutdown()
+
+    summary = _summary(_measure(validate, repeat))
+    return _result(summary["median"], "s", "lower", blocks=len(blocks), workers=workers, **summary)
+
+
+def bench_chain_endpoint(repeat: int) -> Dict[str, dict]:
+    from fastapi.testclient import TestClient
+    from app import app
+
+    results = {}
+    client = TestClient(app)
+    variants = {
+        "chain_json": ("/chain", {}),
+        "chain_binary": ("/chain", {"Accept": "application/octet-stream"}),
+        "chain_headers": ("/chain/headers", {}),
+    }
+    for name, (path, headers) in variants.items():
+        size = len(client.get(path, headers=headers).content)  # прогрев
+        summary = _summary(_measure(lambda: client.get(path, headers=headers).content, repeat))
+        results[name] = _result(summary["median"], "s", "lower", bytes=size, **summary)
+    return results
+
+
+# -------------------------
+# ЗАПУСК
+# -------------------------
+
+def _configure(args):
+    # настройки узла читаются при импорте node.config
+    os.environ["STORAGE_BACKEND"] = args.backend
+    # сложность 1 без пересчёта — синтетическая цепочка строится без перебора nonce
+    os.environ["INITIAL_DIFFICULTY"] = "1"
+    os.environ["RETARGET_INTERVAL"] = "0"
+    os.environ["MINER_WORKERS"] = "1"
+    os.environ["VALIDATION_WORKERS"] = str(args.workers)
+    # снимки по интервалу не пишутся — они исказили бы время сборки цепочки
+    os.environ["SNAPSHOT_INTERVAL"] = "0"
+    # кошелёк подписывает payload с меткой времени, узел — без неё,
+    # поэтому подписи в нагрузке узлом не проверяются
+    os.environ["VERIFY_SIGNATURES"] = "0"
+
+
+def run(args) -> dict:
+    from bench import workload
+    from storage import blockchain
+
+    rng = random.Random(args.seed)
+    results = {}
+
+    wallets = workload.make_wallets(args.wallets)
+    chain_txs = workload.make_transactions(wallets, args.chain_transactions, rng)
+    workload.build_chain(blockchain, wallets, args.blocks, chain_txs)
+    admission_txs = workload.make_transactions(wallets, args.transactions, rng)
+    batch_txs = workload.make_transactions(wallets, args.transactions, rng)
+
+    results["merkle_root"] = bench_merkle(admission_txs, args.repeat)
+    results["add_transaction"] = bench_add_transaction(blockchain, admission_txs)
+    results["add_transactions_batch"] = bench_add_transactions(blockchain, batch_txs)
+    addresses = [wallet["address"] for wallet in wallets] + ["0" * 130]
+    results["get_balance"] = bench_get_balance(blockchain, addresses, args.lookups, rng)
+    results["mine_block"] = bench_mine_block(blockchain, wallets[0]["address"])
+    results["hashrate"] = bench_hashrate(args.difficulty, args.workers, args.mining_rounds, rng)
+    results.update(bench_storage(blockchain, "bench_copy", args.backend))
+    results["validate_chain"] = bench_validation(blockchain, args.workers, args.repeat)
+    results.update(bench_chain_endpoint(args.repeat))
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Результаты, ухудшившиеся больше чем на tolerance; изменения — в stderr"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or not previous["value"]:
+            continue
+        ratio = current["value"] / previous["value"]
+        worse = ratio > 1 + tolerance if current["better"] == "lower" else ratio < 1 - tolerance
+        if worse:
+            regressions.append(name)
+        print(f"{name:16} {previous['value']:.6g} -> {current['value']:.6g} {current['unit']} "
+              f"({ratio - 1:+.1%}){'  REGRESSION' if worse else ''}", file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки узла")
+    parser.add_argument("--blocks", type=int, default=200, help="высота синтетической цепочки")
+    parser.add_argument("--wallets", type=int, default=20)
+    parser.add_argument("--chain-transactions", type=int, default=1000,
+                        help="транзакций в блоках цепочки")
+    parser.add_argument("--transactions", type=int, default=1000,
+                        help="транзакций для приёма в мемпул")
+    parser.add_argument("--lookups", type=int, default=10000, help="запросов баланса")
+    parser.add_argument("--difficulty", type=int, default=100000, help="сложность для замера хешрейта")
+    parser.add_argument("--mining-rounds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="процессов майнинга и валидации")
+    parser.add_argument("--repeat", type=int, default=20, help="повторов для замеров задержки")
+    parser.add_argument("--backend", choices=("file", "sqlite"), default="file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="каталог данных (по умолчанию временный, удаляется)")
+    parser.add_argument("--output", help="файл для результатов JSON (по умолчанию stdout)")
+    parser.add_argument("--compare", help="результаты прошлого прогона для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="допустимое ухудшение при сравнении (доля)")
+    args = parser.parse_args()
+
+    _configure(args)
+    cwd = os.getcwd()
+    # прогон идёт в каталоге данных, а "" в sys.path — это текущий каталог
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        workdir = os.path.abspath(args.workdir or tmp)
+        os.makedirs(workdir, exist_ok=True)
+        os.chdir(workdir)
+        try:
+            results = run(args)
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "params": {key: value for key, value in vars(args).items()
+                   if key not in ("output", "compare", "workdir")},
+        "results": results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Синтетические нагрузки для бенчмарков: кошельки, подписанные
+транзакции и цепочка заданной длины.
+Модули узла импортируются после настройки окружения (см. bench/suite.py).
+"""
+import os
+import random
+from typing import Dict, List
+
+from models.core import Blockchain
+from models.transaction import SignedTransaction
+from persistence import ChainStorage, FileStorage
+from wallet.client_wallet import create_signed_transaction
+from wallet.keys import generate_wallet
+
+
+def make_wallets(count: int) -> List[Dict[str, str]]:
+    return [generate_wallet() for _ in range(count)]
+
+
+def make_transactions(wallets: List[Dict[str, str]], count: int,
+                      rng: random.Random) -> List[SignedTransaction]:
+    """
+    count подписанных переводов между случайными кошельками.
+    Суммы различаются, чтобы у всех транзакций были разные txid.
+    """
+    transactions = []
+    for i in range(count):
+        sender, receiver = rng.sample(wallets, 2)
+        tx = create_signed_transaction(
+            sender["address"], sender["private_key"], receiver["address"],
+            round(0.001 + i * 1e-6, 6)
+        )
+        transactions.append(SignedTransaction(
+            sender=tx.sender,
+            receiver=tx.receiver,
+            amount=tx.amount,
+            signature=tx.signature
+        ))
+    return transactions
+
+
+def build_chain(blockchain: Blockchain, wallets: List[Dict[str, str]], blocks: int,
+                transactions: List[SignedTransaction]):
+    """
+    Дописывает blocks блоков; награды идут кошелькам по кругу,
+    transactions распределяются по блокам поровну.
+    """
+    per_block = -(-len(transactions) // blocks) if blocks else 0
+    pending = iter(transactions)
+    for height in range(blocks):
+        # первые блоки только раздают награды, иначе переводам нечем платить
+        if height >= len(wallets):
+            for tx in [tx for _, tx in zip(range(per_block), pending)]:
+                try:
+                    blockchain.add_transaction(tx)
+                except ValueError:
+                    continue
+        blockchain.mine_block(wallets[height % len(wallets)]["address"])
+
+
+def open_storage_at(directory: str, backend: str) -> ChainStorage:
+    """Отдельное хранилище в directory, не связанное с хранилищем узла"""
+    os.makedirs(directory, exist_ok=True)
+    if backend == "sqlite":
+        from sqlite_storage import SQLiteStorage
+        return SQLiteStorage(os.path.join(directory, "chain.sqlite"))
+    return FileStorage(os.path.join(directory, "blocks"), os.path.join(directory, "index.sqlite"))
+
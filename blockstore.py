@@ -0,0 +1,237 @@
+import mmap
+import os
+import struct
+import threading
+from typing import Iterator, List, Tuple
+
+# Запись в сегменте: [u32 длина][payload]
+RECORD_HEADER = struct.Struct("<I")
+# Запись индекса на каждую высоту: (номер сегмента, смещение записи, длина payload)
+INDEX_ENTRY = struct.Struct("<IQI")
+
+SEGMENT_SIZE = 16 * 1024 * 1024
+INDEX_FILE = "index.dat"
+
+
+def _segment_name(number: int) -> str:
+    return f"blk{number:05d}.dat"
+
+
+def fsync_dir(path: str):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class BlockStore:
+    """
+    Сегментированное append-only хранилище блоков.
+    Один блок — одна запись с префиксом длины; index.dat хранит
+    смещение записи для каждой высоты, поэтому добавление блока
+    пишет только этот блок, а не всю цепочку.
+    """
+
+    def __init__(self, directory: str, segment_size: int = SEGMENT_SIZE):
+        self.directory = directory
+        self.segment_size = segment_size
+        os.makedirs(directory, exist_ok=True)
+
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self.entries: List[Tuple[int, int, int]] = []
+        self._maps = {}  # номер сегмента -> mmap только для чтения
+        # чтение из mmap идёт из потоков запросов параллельно с записью
+        self._lock = threading.RLock()
+        self._load_index()
+        self._recover()
+
+    # -------------------------
+    # ОТКРЫТИЕ / ВОССТАНОВЛЕНИЕ
+    # -------------------------
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, _segment_name(number))
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+
+        with open(self.index_path, "rb") as f:
+            raw = f.read()
+
+        usable = len(raw) - len(raw) % INDEX_ENTRY.size
+        self.entries = [
+            INDEX_ENTRY.unpack_from(raw, pos)
+            for pos in range(0, usable, INDEX_ENTRY.size)
+        ]
+
+    def _recover(self):
+        """
+        Отбрасывает хвост, недописанный при падении:
+        записи индекса, указывающие за конец сегмента,
+        и байты сегмента после последней проиндексированной записи.
+        """
+        sizes = {}
+        valid = 0
+        for segment, offset, length in self.entries:
+            if segment not in sizes:
+                path = self._segment_path(segment)
+                sizes[segment] = os.path.getsize(path) if os.path.exists(path) else -1
+            if offset + RECORD_HEADER.size + length > sizes[segment]:
+                break
+            valid += 1
+
+        if valid != len(self.entries) or self._index_size() != valid * INDEX_ENTRY.size:
+            self.entries = self.entries[:valid]
+            self._truncate_index()
+
+        self._truncate_segments()
+
+    def _index_size(self) -> int:
+        if not os.path.exists(self.index_path):
+            return 0
+        return os.path.getsize(self.index_path)
+
+    def _truncate_index(self):
+        with open(self.index_path, "ab") as f:
+            f.truncate(len(self.entries) * INDEX_ENTRY.size)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _truncate_segments(self):
+        """Обрезает текущий сегмент по концу последней записи и удаляет лишние сегменты"""
+        if self.entries:
+            segment, offset, length = self.entries[-1]
+            end = offset + RECORD_HEADER.size + length
+        else:
+            segment, end = 0, 0
+
+        path = self._segment_path(segment)
+        if os.path.exists(path) and os.path.getsize(path) != end:
+            with open(path, "ab") as f:
+                f.truncate(end)
+                f.flush()
+                os.fsync(f.fileno())
+
+        for name in os.listdir(self.directory):
+            if name.startswith("blk") and name.endswith(".dat"):
+                if int(name[3:-4]) > segment:
+                    os.remove(os.path.join(self.directory, name))
+
+    # -------------------------
+    # ЗАПИСЬ
+    # -------------------------
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def append(self, payload: bytes):
+        with self._lock:
+            self._append(payload)
+
+    def _append(self, payload: bytes):
+        if self.entries:
+            segment, offset, length = self.entries[-1]
+            end = offset + RECORD_HEADER.size + length
+            if end > 0 and end + RECORD_HEADER.size + len(payload) > self.segment_size:
+                segment, end = segment + 1, 0
+        else:
+            segment, end = 0, 0
+
+        with open(self._segment_path(segment), "ab") as f:
+            f.write(RECORD_HEADER.pack(len(payload)) + payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+        entry = (segment, end, len(payload))
+        with open(self.index_path, "ab") as f:
+            f.write(INDEX_ENTRY.pack(*entry))
+            f.flush()
+            os.fsync(f.fileno())
+
+        if end == 0:
+            fsync_dir(self.directory)
+        self.entries.append(entry)
+
+    def truncate(self, height: int):
+        """Оставляет только первые height блоков"""
+        with self._lock:
+            if height >= len(self.entries):
+                return
+
+            # обрезать отображённый в память файл нельзя — сначала закрываем mmap
+            self.close_maps()
+            self.entries = self.entries[:height]
+            self._truncate_index()
+            self._truncate_segments()
+
+    # -------------------------
+    # ЧТЕНИЕ
+    # -------------------------
+
+    def _map(self, segment: int, end: int) -> mmap.mmap:
+        """mmap сегмента, переоткрывается если сегмент дописан после отображения"""
+        mm = self._maps.get(segment)
+        if mm is not None and len(mm) >= end:
+            return mm
+
+        if mm is not None:
+            mm.close()
+        with open(self._segment_path(segment), "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps[segment] = mm
+        return mm
+
+    def close_maps(self):
+        with self._lock:
+            for mm in self._maps.values():
+                mm.close()
+            self._maps.clear()
+
+    def read(self, height: int) -> bytes:
+        with self._lock:
+            segment, offset, length = self.entries[height]
+            start = offset + RECORD_HEADER.size
+            mm = self._map(segment, start + length)
+            return mm[start:start + length]
+
+    def read_prefix(self, height: int, size: int) -> bytes:
+        """Первые size байт записи"""
+        with self._lock:
+            segment, offset, length = self.entries[height]
+            start = offset + RECORD_HEADER.size
+            mm = self._map(segment, start + length)
+            return mm[start:start + min(size, length)]
+
+    def read_until(self, height: int, separator: bytes) -> bytes:
+        """Начало записи до разделителя — без копирования остальной записи"""
+        with self._lock:
+            segment, offset, length = self.entries[height]
+            start = offset + RECORD_HEADER.size
+            mm = self._map(segment, start + length)
+            end = mm.find(separator, start, start + length)
+            if end == -1:
+                end = start + length
+            return mm[start:end]
+
+    def iter_records(self, start: int = 0) -> Iterator[bytes]:
+        """Потоково читает записи по порядку, по одному сегменту за раз"""
+        current, f = None, None
+        try:
+            for segment, offset, length in self.entries[start:]:
+                if segment != current:
+                    if f:
+                        f.close()
+                    f = open(self._segment_path(segment), "rb")
+                    current = segment
+                f.seek(offset + RECORD_HEADER.size)
+                yield f.read(length)
+        finally:
+            if f:
+                f.close()
@@ -0,0 +1,187 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from models.block import Block
+from node.config import UNDO_DEPTH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    hash TEXT PRIMARY KEY,
+    height INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blocks_height ON blocks(height);
+
+CREATE TABLE IF NOT EXISTS txs (
+    txid TEXT NOT NULL,
+    height INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (height, position)
+);
+CREATE INDEX IF NOT EXISTS txs_txid ON txs(txid);
+
+CREATE TABLE IF NOT EXISTS address_txs (
+    address TEXT NOT NULL,
+    height INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    txid TEXT NOT NULL,
+    PRIMARY KEY (address, height, position)
+);
+CREATE INDEX IF NOT EXISTS address_txs_height ON address_txs(height);
+
+CREATE TABLE IF NOT EXISTS undo (
+    height INTEGER PRIMARY KEY,
+    balances TEXT NOT NULL
+);
+"""
+
+# Данные отката блока: балансы затронутых адресов до блока (None — адреса не было)
+UndoData = Dict[str, Optional[float]]
+
+
+def _height_bound(below: Optional[int]) -> int:
+    # без ограничения — больше любой высоты (INTEGER в SQLite 64-битный)
+    return (1 << 63) - 1 if below is None else below
+
+
+class ChainIndex:
+    """
+    Постоянные индексы цепочки в SQLite:
+    hash блока -> высота, txid -> (высота, позиция), адрес -> txid,
+    и данные отката последних undo_depth блоков.
+    Обновляются при подключении/отключении блоков.
+    """
+
+    def __init__(self, path: str, undo_depth: int = UNDO_DEPTH):
+        self.path = path
+        self.undo_depth = undo_depth
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    # -------------------------
+    # ЗАПИСЬ
+    # -------------------------
+
+    @staticmethod
+    def _rows(height: int, block: Block):
+        txs = []
+        addresses = []
+        for position, tx in enumerate(block.transactions):
+            txid = tx.txid()
+            txs.append((txid, height, position))
+            for address in {tx.sender, tx.receiver}:
+                addresses.append((address, height, position, txid))
+        return txs, addresses
+
+    def _index_blocks(self, start_height: int, blocks: List[Block],
+                      undo: Optional[List[UndoData]] = None):
+        if undo is not None:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO undo (height, balances) VALUES (?, ?)",
+                [(start_height + offset, json.dumps(data)) for offset, data in enumerate(undo)]
+            )
+            # откат глубже undo_depth блоков идёт по обратным дельтам
+            self._conn.execute(
+                "DELETE FROM undo WHERE height < ?",
+                (start_height + len(blocks) - self.undo_depth,)
+            )
+
+        for offset, block in enumerate(blocks):
+            height = start_height + offset
+            txs, addresses = self._rows(height, block)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blocks (hash, height) VALUES (?, ?)",
+                (block.header.hash, height)
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO txs (txid, height, position) VALUES (?, ?, ?)", txs
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO address_txs (address, height, position, txid) "
+                "VALUES (?, ?, ?, ?)", addresses
+            )
+
+    def _unindex_from(self, height: int):
+        self._conn.execute("DELETE FROM blocks WHERE height >= ?", (height,))
+        self._conn.execute("DELETE FROM txs WHERE height >= ?", (height,))
+        self._conn.execute("DELETE FROM address_txs WHERE height >= ?", (height,))
+        self._conn.execute("DELETE FROM undo WHERE height >= ?", (height,))
+
+    def connect_blocks(self, start_height: int, blocks: List[Block],
+                       undo: Optional[List[UndoData]] = None):
+        """Индексирует блоки с высоты start_height одной транзакцией"""
+        with self._lock, self._conn:
+            self._index_blocks(start_height, blocks, undo)
+
+    def disconnect_from(self, height: int):
+        """Удаляет из индексов блоки с высоты height и выше"""
+        with self._lock, self._conn:
+            self._unindex_from(height)
+
+    # -------------------------
+    # ЧТЕНИЕ
+    # -------------------------
+
+    def indexed_height(self) -> int:
+        """Сколько блоков (от генезиса) уже проиндексировано"""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(height) FROM blocks").fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def block_height(self, block_hash: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT height FROM blocks WHERE hash = ?", (block_hash,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def tx_location(self, txid: str) -> Optional[Tuple[int, int]]:
+        # одинаковые транзакции (например, coinbase) бывают в разных блоках —
+        # возвращается самое свежее вхождение
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT height, position FROM txs WHERE txid = ? "
+                "ORDER BY height DESC LIMIT 1", (txid,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def address_transactions(self, address: str, offset: int = 0, limit: int = 50,
+                             below: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """(txid, высота, позиция) по адресу, от новых к старым; below — только блоки ниже этой высоты"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT txid, height, position FROM address_txs WHERE address = ? AND height < ? "
+                "ORDER BY height DESC, position DESC LIMIT ? OFFSET ?",
+                (address, _height_bound(below), limit, offset)
+            ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def load_undo(self, start_height: int) -> List[Optional[UndoData]]:
+        """Данные отката блоков с высоты start_height; None там, где их нет"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT height, balances FROM undo WHERE height >= ? ORDER BY height",
+                (start_height,)
+            ).fetchall()
+        if not rows:
+            return []
+        undo: List[Optional[UndoData]] = [None] * (rows[-1][0] - start_height + 1)
+        for height, balances in rows:
+            undo[height - start_height] = json.loads(balances)
+        return undo
+
+    def address_transaction_count(self, address: str, below: Optional[int] = None) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM address_txs WHERE address = ? AND height < ?",
+                (address, _height_bound(below))
+            ).fetchone()
+        return row[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,24 +1,27 @@
+# Модели API совпадают с моделями ядра: иначе pydantic не принимает
+# транзакции из /transactions внутри models.block.Block при майнинге.
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
-from typing import List
-from datetime import datetime
+from models.transaction import SignedTransaction
+from models.block import BlockHeader, Block
+from node.config import GOSSIP_MAX_INVENTORY
 
 
-class SignedTransaction(BaseModel):
-    sender: str = Field(..., description="Public key / address отправителя")
-    receiver: str = Field(..., description="Адрес получателя")
-    amount: float = Field(..., gt=0)
-    signature: str = Field(..., description="ECDSA signature (hex)")
+class Inventory(BaseModel):
+    """
+    Объявление о новых объектах в сети (gossip): пачка хешей hashes
+    или один hash (так объявляют узлы прежних версий)
+    """
+    kind: Literal["tx", "block"]
+    hashes: List[str] = Field(default_factory=list, max_length=GOSSIP_MAX_INVENTORY)
+    hash: Optional[str] = None
+    origin: str
 
+    def all_hashes(self) -> List[str]:
+        return self.hashes + ([self.hash] if self.hash else [])
 
-class BlockHeader(BaseModel):
-    index: int
-    previous_hash: str
-    merkle_root: str
-    timestamp: float
-    nonce: int
-    difficulty: int
-    hash: str
 
-class Block(BaseModel):
-    header: BlockHeader
-    transactions: List[SignedTransaction]
\ No newline at end of file
+class MiningSubmission(BaseModel):
+    """Решение для шаблона из GET /mining/template"""
+    template_id: str
+    nonce: int = Field(..., ge=0, lt=2 ** 64)
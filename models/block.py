@@ -1,24 +1,36 @@
 from pydantic import BaseModel, Field
 from typing import List
 from models.transaction import SignedTransaction
-import hashlib
+from models.merkle import calculate_merkle_root
+from node.miner import target_for_difficulty
 import time
 
+# index, nonce и difficulty сериализуются как u64 (models/encoding.py)
+U64 = 2 ** 64
+
 class BlockHeader(BaseModel):
-    index: int
+    index: int = Field(..., ge=0, lt=U64)
     previous_hash: str
     merkle_root: str
     timestamp: float
-    nonce: int
-    difficulty: int
+    nonce: int = Field(..., ge=0, lt=U64)
+    difficulty: int = Field(..., ge=0, lt=U64)
     hash: str
 
+    def compute_hash(self) -> str:
+        """
+        Канонический хеш заголовка — ровно так, как его считает майнер:
+        sha256 бинарной сериализации всех полей, кроме hash
+        """
+        from models.encoding import header_hash  # encoding импортирует эту модель
+        return header_hash(self)
+
 class Block(BaseModel):
     header: BlockHeader
     transactions: List[SignedTransaction]
 
     @staticmethod
-    def create_genesis_block(self, difficulty: int = 2):
+    def create_genesis_block(difficulty: int = 256):
         header = BlockHeader(
             index=0,
             previous_hash="0" * 64,
@@ -36,30 +48,19 @@ class Block(BaseModel):
         return Block(header=header, transactions=[])
 
     def compute_hash(self):
-        block_string = f"{self.header.index}{self.header.previous_hash}{self.header.merkle_root}{self.header.timestamp}{self.header.nonce}"
-        return hashlib.sha256(block_string.encode()).hexdigest()
+        return self.header.compute_hash()
 
     def is_block_valid(self, previous_block):
         if self.header.previous_hash != previous_block.header.hash:
             return False
 
-        if not self.header.hash.startswith("0" * self.header.difficulty):
+        if int(self.header.hash, 16) >= target_for_difficulty(self.header.difficulty):
             return False
 
         if self.compute_hash() != self.header.hash:
             return False
 
-        # #PoW
-        # if not block.hash.startswith("0" * block.header.difficulty):
-        #     return False
-        # # merkle_root
-        # if block.header.merkle_root != calculate_merkle_root(block.transactions):
-        #     return False
-        # # hash корректен
-        # recalculated_hash = self.calculate_block_hash(
-        #     block.index, block.header, block.transactions
-        # )
-        # if recalculated_hash != block.hash:
-        #     return False
+        if self.header.merkle_root != calculate_merkle_root(self.transactions):
+            return False
 
-        return True
\ No newline at end of file
+        return True
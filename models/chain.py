@@ -0,0 +1,184 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Iterator, Optional
+
+from models.block import Block, BlockHeader
+from models.compact import CompactBlock, HeaderList
+from models.state import StateIndex
+
+
+class LazyChain:
+    """
+    Цепочка блоков, в которой заголовки всегда лежат в памяти,
+    а полные блоки подгружаются из хранилища по требованию
+    и держатся в LRU последних использованных блоков.
+    cache_size=None — без вытеснения (все блоки в памяти).
+
+    Заголовки и блоки хранятся в компактном виде (models/compact.py),
+    индексация цепочки возвращает pydantic-модель Block.
+
+    Список заголовков только дописывается; отрезание хвоста создаёт
+    новый список, поэтому ChainView может держать ссылку на старый.
+    """
+
+    def __init__(
+        self,
+        headers: Optional[Iterable[BlockHeader]] = None,
+        loader: Optional[Callable[[int], Block]] = None,
+        cache_size: Optional[int] = 256,
+    ):
+        self.headers = headers if isinstance(headers, HeaderList) else HeaderList(headers or ())
+        self.loader = loader
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[int, CompactBlock]" = OrderedDict()
+        # кэш читается из потоков запросов параллельно с записью;
+        # поколение растёт при отрезании хвоста, чтобы блок, прочитанный
+        # до реорганизации, не попал в кэш после неё
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    @classmethod
+    def from_blocks(cls, blocks: Iterable[Block], loader=None, cache_size=None) -> "LazyChain":
+        chain = cls(loader=loader, cache_size=cache_size)
+        chain.extend(blocks)
+        return chain
+
+    # -------------------------
+    # КЭШ
+    # -------------------------
+
+    def _put(self, height: int, block: CompactBlock):
+        self._cache[height] = block
+        self._cache.move_to_end(height)
+        if self.cache_size is not None:
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _remember(self, height: int, block: Block):
+        compact = CompactBlock(block)
+        with self._lock:
+            self._put(height, compact)
+
+    def _get(self, height: int) -> Block:
+        with self._lock:
+            compact = self._cache.get(height)
+            if compact is not None:
+                self._cache.move_to_end(height)
+                return compact.to_model()
+            generation = self._generation
+
+        if self.loader is None:
+            raise IndexError(f"Block {height} is not loaded")
+
+        block = self.loader(height)
+        compact = CompactBlock(block)
+        with self._lock:
+            if generation == self._generation:
+                self._put(height, compact)
+        return block
+
+    # -------------------------
+    # ПОСЛЕДОВАТЕЛЬНОСТЬ
+    # -------------------------
+
+    def __len__(self) -> int:
+        return len(self.headers)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._get(i) for i in range(*item.indices(len(self)))]
+
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("chain index out of range")
+        return self._get(item)
+
+    def __iter__(self):
+        for height in range(len(self)):
+            yield self._get(height)
+
+    def __delitem__(self, item):
+        # поддерживается только отрезание хвоста: del chain[height:]
+        if not isinstance(item, slice) or item.stop is not None or item.step is not None:
+            raise TypeError("only tail truncation (del chain[n:]) is supported")
+
+        start = item.indices(len(self))[0]
+        self.headers = self.headers[:start]
+        with self._lock:
+            self._generation += 1
+            for height in [h for h in self._cache if h >= start]:
+                del self._cache[height]
+
+    def append(self, block: Block):
+        self.headers.append(block.header)
+        self._remember(len(self.headers) - 1, block)
+
+    def extend(self, blocks: Iterable[Block]):
+        for block in blocks:
+            self.append(block)
+
+
+class ChainView:
+    """
+    Неизменяемый срез цепочки для читателей.
+    Собирается писателем при смене вершины и дальше читается без
+    блокировки: высота и список заголовков фиксированы, блок,
+    отключённый реорганизацией после создания среза, не выдаётся.
+    """
+
+    def __init__(self, chain: LazyChain,
+                 iter_blocks: Optional[Callable[[int], Iterator[Block]]] = None,
+                 state: Optional[StateIndex] = None):
+        self.headers = chain.headers
+        self.height = len(chain.headers)
+        # состояние на момент среза: новый блок меняет его на месте,
+        # реорганизация подменяет объект целиком
+        self.state = state
+        self._chain = chain
+        self._iter_blocks = iter_blocks
+
+    def __len__(self) -> int:
+        return self.height
+
+    @property
+    def tip(self) -> BlockHeader:
+        return self.headers[self.height - 1]
+
+    def header(self, height: int) -> BlockHeader:
+        if not 0 <= height < self.height:
+            raise IndexError("chain index out of range")
+        return self.headers[height]
+
+    def block(self, height: int) -> Block:
+        expected = self.header(height)
+        block = self._chain[height]
+        if block.header.hash != expected.hash:
+            raise IndexError(f"Block {height} was disconnected")
+        return block
+
+    def balance(self, address: str) -> Optional[float]:
+        """
+        Баланс на вершине среза без блокировки записи; None, если
+        к состоянию уже применяется или применён следующий блок
+        """
+        state = self.state
+        height = state.height
+        balance = state.get_balance(address)
+        if height != self.height or state.height != height:
+            return None
+        return balance
+
+    def blocks(self, start: int, end: int) -> Iterator[Block]:
+        """
+        Блоки [start, end) потоковым чтением хранилища, без кэширования;
+        поток обрывается, если хвост отключён реорганизацией.
+        """
+        end = min(end, self.height)
+        if start >= end:
+            return
+        source = self._iter_blocks(start) if self._iter_blocks else iter(self._chain[start:end])
+        for height, block in zip(range(start, end), source):
+            if block.header.hash != self.headers[height].hash:
+                return
+            yield block
@@ -0,0 +1,164 @@
+"""
+Компактное представление цепочки в памяти узла.
+
+Заголовки лежат подряд записями фиксированной длины (models/encoding.py)
+в одном bytearray, хеши и подписи в блоках — сырыми байтами, адреса
+интернируются (одна строка на адрес на всю цепочку). Pydantic-модели
+собираются только при выдаче блока наружу (to_model).
+"""
+import sys
+from typing import Iterable, Iterator, Union
+
+from models import encoding
+from models.block import Block, BlockHeader
+from models.transaction import SignedTransaction
+
+HEADER_SIZE = encoding.HEADER_SIZE
+
+
+def _pack_str(value: str) -> Union[bytes, str]:
+    """hex-строка -> сырые байты; остальное (например "COINBASE") как есть"""
+    if len(value) % 2 == 0:
+        try:
+            raw = bytes.fromhex(value)
+        except ValueError:
+            return value
+        if raw.hex() == value:
+            return raw
+    return value
+
+
+def _unpack_str(value: Union[bytes, str]) -> str:
+    return value.hex() if isinstance(value, bytes) else value
+
+
+# -------------------------
+# ЗАГОЛОВКИ
+# -------------------------
+
+class CompactHeader:
+    """Заголовок только для чтения с теми же полями, что у BlockHeader"""
+    __slots__ = ("index", "_previous_hash", "_merkle_root", "timestamp", "nonce", "difficulty", "_hash")
+
+    def __init__(self, index: int, previous_hash: bytes, merkle_root: bytes,
+                 timestamp: float, nonce: int, difficulty: int, block_hash: bytes):
+        self.index = index
+        self._previous_hash = previous_hash
+        self._merkle_root = merkle_root
+        self.timestamp = timestamp
+        self.nonce = nonce
+        self.difficulty = difficulty
+        self._hash = block_hash
+
+    @classmethod
+    def unpack(cls, data, pos: int = 0) -> "CompactHeader":
+        return cls(*encoding.unpack_header(data, pos))
+
+    @property
+    def previous_hash(self) -> str:
+        return self._previous_hash.hex()
+
+    @property
+    def merkle_root(self) -> str:
+        return self._merkle_root.hex()
+
+    @property
+    def hash(self) -> str:
+        return self._hash.hex()
+
+    def to_model(self) -> BlockHeader:
+        return BlockHeader.model_construct(
+            index=self.index,
+            previous_hash=self.previous_hash,
+            merkle_root=self.merkle_root,
+            timestamp=self.timestamp,
+            nonce=self.nonce,
+            difficulty=self.difficulty,
+            hash=self.hash,
+        )
+
+
+class HeaderList:
+    """
+    Заголовки цепочки в одном bytearray, HEADER_SIZE байт на заголовок.
+    Последовательность для LazyChain и ChainView: len, индекс, срез
+    (копия — новый HeaderList), итерация и дописывание в конец.
+    """
+    __slots__ = ("_data",)
+
+    def __init__(self, headers: Iterable = ()):
+        self._data = bytearray()
+        for header in headers:
+            self.append(header)
+
+    @classmethod
+    def from_records(cls, records: Iterable[bytes]) -> "HeaderList":
+        """Из уже закодированных заголовков (encoding.encode_header)"""
+        headers = cls()
+        headers._data = bytearray(b"".join(records))
+        return headers
+
+    def __len__(self) -> int:
+        return len(self._data) // HEADER_SIZE
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            headers = HeaderList()
+            headers._data = self._data[start * HEADER_SIZE:max(start, stop) * HEADER_SIZE]
+            return headers
+
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("header index out of range")
+        return CompactHeader.unpack(self._data, item * HEADER_SIZE)
+
+    def __iter__(self) -> Iterator[CompactHeader]:
+        for height in range(len(self)):
+            yield self[height]
+
+    def append(self, header):
+        self._data += encoding.encode_header(header)
+
+
+# -------------------------
+# БЛОКИ
+# -------------------------
+
+class CompactTransaction:
+    __slots__ = ("sender", "receiver", "amount", "_signature")
+
+    def __init__(self, tx: SignedTransaction):
+        self.sender = sys.intern(tx.sender)
+        self.receiver = sys.intern(tx.receiver)
+        self.amount = tx.amount
+        self._signature = _pack_str(tx.signature)
+
+    @property
+    def signature(self) -> str:
+        return _unpack_str(self._signature)
+
+    def to_model(self) -> SignedTransaction:
+        return SignedTransaction.model_construct(
+            sender=self.sender,
+            receiver=self.receiver,
+            amount=self.amount,
+            signature=self.signature,
+        )
+
+
+class CompactBlock:
+    __slots__ = ("header", "transactions")
+
+    def __init__(self, block: Block):
+        self.header = CompactHeader.unpack(encoding.encode_header(block.header))
+        self.transactions = tuple(CompactTransaction(tx) for tx in block.transactions)
+
+    def to_model(self) -> Block:
+        return Block.model_construct(
+            header=self.header.to_model(),
+            transactions=[tx.to_model() for tx in self.transactions],
+        )
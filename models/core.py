@@ -1,95 +1,299 @@
 import hashlib
-import json
+import threading
 import time
-from typing import List
-from models.api import BlockHeader
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import ec
-from cryptography.exceptions import InvalidSignature
-from node.config import BLOCK_REWARD
-from persistence import save_chain, load_chain
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from node.config import (
+    LAZY_CHAIN, BLOCK_CACHE_SIZE, MINER_WORKERS,
+    VERIFY_SIGNATURES, SIGNATURE_WORKERS, SIGNATURE_BATCH_THRESHOLD,
+    MEMPOOL_MAX_SIZE, MAX_BLOCK_TRANSACTIONS, VALIDATION_WORKERS, VALIDATION_CHUNK_SIZE,
+    MERKLE_CACHE_SIZE, SNAPSHOT_INTERVAL, INITIAL_DIFFICULTY, RETARGET_INTERVAL, TARGET_BLOCK_TIME,
+    NODE_ADDRESS
+)
+from node import metrics
+from node.miner import cancel_mining, mine_header, target_for_difficulty
+from persistence import SNAPSHOT_FILE, ChainStorage, get_storage
 from models.transaction import SignedTransaction
 from models.block import Block
+from models.chain import ChainView, LazyChain
+from models.state import StateIndex
+from models.mempool import Mempool
+from models.signatures import COINBASE_SENDERS, SignatureVerifier
+from models.merkle import MerkleTreeCache
+from models.validator import ChainValidator
+from models.encoding import header_hash, header_prefix
+from models.snapshot import read_snapshot, take_snapshot, write_snapshot
+from models.template import BlockTemplate, StaleTemplateError
+
+
+# Сколько раз перестраивать шаблон блока, если вершина сменилась во время майнинга
+MINING_ATTEMPTS = 3
+# Сколько выданных внешним майнерам шаблонов помнить для /mining/submit
+ISSUED_TEMPLATES = 16
+
+TRANSACTIONS = metrics.counter(
+    "node_transactions_total", "Transactions submitted to the mempool", ("result",)
+)
+TX_ADMISSION_SECONDS = metrics.histogram(
+    "node_transaction_admission_seconds", "Time to validate and admit a transaction"
+)
+TX_BATCH_SECONDS = metrics.histogram(
+    "node_transaction_batch_seconds", "Time to validate and admit a transaction batch"
+)
+BALANCE_SECONDS = metrics.histogram(
+    "node_balance_lookup_seconds", "Balance lookup latency"
+)
+MINING_SECONDS = metrics.histogram(
+    "node_mining_seconds", "Nonce search time of mined blocks"
+)
+MINING_HASHRATE = metrics.gauge(
+    "node_mining_hashrate", "Hash rate of the last mined block, hashes per second"
+)
+MINING_HASHES = metrics.counter(
+    "node_mining_hashes_total", "Hashes computed for mined blocks"
+)
+MINING_RESTARTS = metrics.counter(
+    "node_mining_restarts_total", "Mining attempts dropped because the chain tip changed"
+)
+BLOCKS_CONNECTED = metrics.counter(
+    "node_blocks_connected_total", "Blocks connected to the chain tip", ("source",)
+)
+REORGANIZATIONS = metrics.counter(
+    "node_reorganizations_total", "Chain reorganizations"
+)
+REORG_DISCONNECTED = metrics.counter(
+    "node_reorg_disconnected_blocks_total", "Blocks disconnected by reorganizations"
+)
+REORG_REINJECTED = metrics.counter(
+    "node_reorg_reinjected_transactions_total",
+    "Transactions from disconnected blocks returned to the mempool"
+)
+MEMPOOL_EVICTED = metrics.counter(
+    "node_mempool_evicted_transactions_total",
+    "Mempool transactions dropped because the sender's new balance no longer covers them"
+)
 
-def sha256(data: str) -> str:
-    return hashlib.sha256(data.encode()).hexdigest()
 
-
-def tx_payload(tx: SignedTransaction) -> bytes:
+class Blockchain:
     """
-    Данные, которые реально подписываются
+    Цепочка, состояние и мемпул узла.
+    Все изменения идут через self.lock (один писатель); читатели берут
+    неизменяемый срез view() и не ждут писателя. Майнинг выполняется
+    вне блокировки и прерывается, когда появляется новая вершина.
     """
-    payload = {
-        "sender": tx.sender,
-        "receiver": tx.receiver,
-        "amount": tx.amount,
-    }
-    return json.dumps(payload, sort_keys=True).encode()
-
-def verify_signature(tx: SignedTransaction) -> bool:
-    if tx.sender in ("0" * 64, "NETWORK"):
-        return True  # coinbase
-
-    try:
-        public_key = ec.EllipticCurvePublicKey.from_encoded_point(
-            ec.SECP256K1(),
-            bytes.fromhex(tx.sender)
-        )
 
-        public_key.verify(
-            bytes.fromhex(tx.signature),
-            tx_payload(tx),
-            ec.ECDSA(hashes.SHA256())
+    def __init__(self, difficulty: int = INITIAL_DIFFICULTY, storage: ChainStorage = None):
+        # сложность генезиса; дальше она пересчитывается по меткам времени блоков
+        self.difficulty = difficulty
+        self.lock = threading.RLock()
+        self._tip_version = 0
+        self._pending = None
+        self.storage = storage if storage is not None else get_storage()
+        self.mempool = Mempool(max_size=MEMPOOL_MAX_SIZE, on_remove=self._mempool_removed)
+        self.state = StateIndex()
+        self.last_mining_stats = None
+        self.merkle_trees = MerkleTreeCache(MERKLE_CACHE_SIZE)
+        self.verify_signatures = VERIFY_SIGNATURES
+        self.verifier = SignatureVerifier(
+            workers=SIGNATURE_WORKERS,
+            batch_threshold=SIGNATURE_BATCH_THRESHOLD
+        )
+        self.validator = ChainValidator(
+            retarget_interval=RETARGET_INTERVAL,
+            target_block_time=TARGET_BLOCK_TIME,
+            initial_difficulty=INITIAL_DIFFICULTY,
+            verifier=self.verifier if self.verify_signatures else None,
+            workers=VALIDATION_WORKERS,
+            chunk_size=VALIDATION_CHUNK_SIZE,
+            header_at=lambda height: self.chain.headers[height]
         )
-        return True
-
-    except (ValueError, InvalidSignature):
-        return False
 
-def calculate_merkle_root(transactions: List[SignedTransaction]) -> str:
-    if not transactions:
-        return sha256("")
+        if not len(self.storage):
+            self.create_genesis_block()
 
-    hashes = [sha256(json.dumps(tx.dict(), sort_keys=True)) for tx in transactions]
+        # lazy — в памяти только заголовки, полные блоки читаются по требованию
+        if LAZY_CHAIN:
+            self.chain: LazyChain = LazyChain(
+                self.storage.load_headers(),
+                loader=self.storage.read_block,
+                cache_size=BLOCK_CACHE_SIZE
+            )
+        else:
+            self.chain = LazyChain.from_blocks(
+                self.storage.iter_blocks(), loader=self.storage.read_block
+            )
 
-    while len(hashes) > 1:
-        if len(hashes) % 2 == 1:
-            hashes.append(hashes[-1])
+        snapshot = self._restore_state()
+        self._view = ChainView(self.chain, self.storage.iter_blocks, self.state)
 
-        hashes = [
-            sha256(hashes[i] + hashes[i + 1])
-            for i in range(0, len(hashes), 2)
-        ]
+        # собственная цепочка уже проверена
+        for header in self.chain.headers:
+            self.validator.remember(header.hash)
 
-    return hashes[0]
+        # шаблон следующего блока растёт вместе с мемпулом
+        previous = self.chain.headers[-1]
+        self.template = BlockTemplate(
+            self.mempool, previous, self.validator.next_difficulty(previous),
+            NODE_ADDRESS, MAX_BLOCK_TRANSACTIONS
+        )
+        # шаблоны, выданные внешним майнерам: id -> (заголовок, транзакции, дерево)
+        self._issued: "OrderedDict[str, tuple]" = OrderedDict()
+
+        # сохранённый мемпул проверяется заново относительно текущего состояния
+        for tx in self.storage.load_mempool():
+            txid = tx.txid()
+            try:
+                self._admit(tx, txid)
+            except ValueError:
+                self.storage.remove_mempool([txid])
+
+        if snapshot is not None:
+            for raw in snapshot["mempool"]:
+                tx = SignedTransaction.model_validate(raw)
+                txid = tx.txid()
+                # уже в мемпуле или попала в блок после снимка
+                location = self.storage.tx_location(txid)
+                if txid in self.mempool or (location and location[0] >= snapshot["height"]):
+                    continue
+                try:
+                    self._admit(tx, txid)
+                except ValueError:
+                    continue
+                self.storage.add_mempool(txid, tx)
+
+    def _restore_state(self):
+        """
+        Балансы из хранилища, иначе из снимка с доигрыванием блоков после него,
+        иначе полный пересчёт. Возвращает использованный снимок.
+        """
+        balances = self.storage.load_balances()
+        if balances is not None:
+            self.state.load(balances, len(self.chain))
+            return None
+
+        snapshot = read_snapshot(SNAPSHOT_FILE)
+        if snapshot is not None:
+            height = snapshot["height"]
+            # снимок мог остаться от отключённой при реорганизации ветки
+            if 0 < height <= len(self.chain) and self.chain.headers[height - 1].hash == snapshot["tip_hash"]:
+                self.state.load(snapshot["balances"], height)
+            else:
+                snapshot = None
+        if snapshot is None:
+            self.state.load({}, 0)
+
+        # потоковое чтение хранилища, без кэширования блоков
+        for block in self.storage.iter_blocks(self.state.height):
+            self.state.apply_block(block)
+        self.storage.store_balances(self.state.balances)
+        return snapshot
+
+    def save_snapshot(self, path: str = SNAPSHOT_FILE) -> dict:
+        with self.lock:
+            snapshot = take_snapshot(self)
+        write_snapshot(snapshot, path)
+        return snapshot
 
-class Blockchain:
-    def __init__(self, difficulty: int = 2):
-        self.difficulty = difficulty
-        self.mempool: List[SignedTransaction] = []
+    # -------------------------
+    # СРЕЗЫ ДЛЯ ЧТЕНИЯ
+    # -------------------------
 
-        loaded = load_chain()
-        if loaded:
-            self.chain: list[Block] = loaded
-        else:
-            self.chain: List[Block] = []
-            self.create_genesis_block()
-            save_chain(self.chain)
+    def view(self) -> ChainView:
+        """Срез цепочки; его публикует писатель при смене вершины, блокировка не нужна"""
+        return self._view
+
+    def pending(self) -> Tuple[SignedTransaction, ...]:
+        """Срез мемпула; пересобирается только после его изменений"""
+        pending = self._pending
+        if pending is None:
+            with self.lock:
+                pending = self._pending
+                if pending is None:
+                    pending = self._pending = tuple(self.mempool)
+        return pending
+
+    def _changed(self, new_tip: bool = False):
+        """Вызывается под self.lock после любого изменения"""
+        self._pending = None
+        if new_tip:
+            self._view = ChainView(self.chain, self.storage.iter_blocks, self.state)
+            self._tip_version += 1
+            cancel_mining()
+            previous = self.chain.headers[-1]
+            self.template.set_tip(previous, self.validator.next_difficulty(previous))
+            self._issued.clear()
+
+    def _mempool_removed(self, txids: List[str]):
+        self._pending = None
+        self.storage.remove_mempool(txids)
+        self.template.remove(txids)
 
     # -------------------------
     # БАЗОВЫЕ МЕТОДЫ
     # -------------------------
 
     def get_last_block(self) -> Block:
-        return self.chain[-1]
+        view = self.view()
+        return view.block(view.height - 1)
+
+    def find_block_height(self, block_hash: str):
+        return self.storage.block_height(block_hash)
+
+    def find_transaction(self, txid: str):
+        """(высота, позиция, транзакция) или None"""
+        location = self.storage.tx_location(txid)
+        if location is None:
+            return None
+        height, position = location
+        try:
+            block = self.view().block(height)
+        except IndexError:
+            return None  # блок отключён реорганизацией
+        return height, position, block.transactions[position]
+
+    def get_transaction_proof(self, txid: str):
+        """Доказательство включения транзакции для проверки по одним заголовкам"""
+        location = self.storage.tx_location(txid)
+        if location is None:
+            return None
+
+        height, position = location
+        try:
+            block = self.view().block(height)
+        except IndexError:
+            return None
+        tree = self.merkle_trees.get(block)
+        return {
+            "txid": txid,
+            "height": height,
+            "position": position,
+            "block_hash": block.header.hash,
+            "merkle_root": block.header.merkle_root,
+            "proof": tree.proof(position)
+        }
 
     def add_block(self, block: Block):
-        if not block.is_block_valid(self.get_last_block()):
-            raise ValueError("Invalid block")
+        with self.lock:
+            if not self.validator.validate_block(block, self.chain.headers[-1]):
+                raise ValueError("Invalid block")
+
+            self._connect(block, source="peer")
 
+    def _connect(self, block: Block, source: str):
+        """Подключает проверенный блок к вершине (под self.lock)"""
+        undo = self.state.undo_data(block)
         self.chain.append(block)
-        self.mempool.clear()
-        save_chain(self.chain)
+        self.validator.remember(block.header.hash)
+        self.state.apply_block(block)
+        touched = self.state.touched([block])
+        self.storage.connect_block(len(self.chain) - 1, block, touched, undo)
+        self.mempool.remove_included(block.transactions)
+        self._evict_overspent(touched)
+        self._changed(new_tip=True)
+        BLOCKS_CONNECTED.inc(source=source)
+
+        if SNAPSHOT_INTERVAL and len(self.chain) % SNAPSHOT_INTERVAL == 0:
+            self.save_snapshot()
 
     def replace_chain(self, new_chain: List[Block]):
         if len(new_chain) <= len(self.chain):
@@ -98,29 +302,157 @@ class Blockchain:
         if not self.is_chain_valid(new_chain):
             return False
 
-        self.chain = new_chain
-        save_chain(self.chain)
+        fork = self.find_fork_point([block.header.hash for block in new_chain])
+        self.reorganize(fork, new_chain[fork:])
         return True
 
+    def reorganize(self, fork: int, new_blocks: List[Block]):
+        """
+        Отключает локальные блоки выше точки расхождения fork по данным
+        отката, подключает новую ветку блок за блоком и возвращает в мемпул
+        транзакции отключённых блоков, которых нет в новой ветке.
+        На диске меняется только хвост цепочки.
+        """
+        with self.lock:
+            # за время загрузки ветки цепочка могла измениться
+            if not 0 < fork <= len(self.chain) or fork + len(new_blocks) <= len(self.chain):
+                raise ValueError("Branch is not longer than the local chain")
+            if new_blocks and new_blocks[0].header.previous_hash != self.chain.headers[fork - 1].hash:
+                raise ValueError("Branch does not connect to the local chain")
+
+            # новое состояние считается на копии и подменяется целиком,
+            # читатели не видят промежуточных балансов
+            old_blocks = self.chain[fork:]
+            old_undo = self.storage.load_undo(fork)
+            state = self.state.copy()
+            for offset in reversed(range(len(old_blocks))):
+                undo = old_undo[offset] if offset < len(old_undo) else None
+                if undo is None:
+                    # данных отката нет (блок старше UNDO_DEPTH) — обратные дельты
+                    state.revert_block(old_blocks[offset])
+                else:
+                    state.undo_block(undo)
+
+            new_undo = []
+            for block in new_blocks:
+                new_undo.append(state.undo_data(block))
+                state.apply_block(block)
+
+            # хвост хранилища заменяется одной операцией вместе с балансами
+            touched = state.touched(old_blocks + list(new_blocks))
+            self.storage.connect_blocks(fork, new_blocks, touched, new_undo)
+
+            for block in old_blocks:
+                self.validator.forget(block.header.hash)
+                self.merkle_trees.discard(block.header.hash)
+            del self.chain[fork:]
+            self.chain.extend(new_blocks)
+            self.state = state
+            for block in new_blocks:
+                self.validator.remember(block.header.hash)
+                self.mempool.remove_included(block.transactions)
+            # откат мог забрать у адреса поступления, которые он уже тратит
+            self._evict_overspent(touched)
+
+            reinjected = self._reinject(old_blocks, new_blocks)
+            self._changed(new_tip=True)
+            REORGANIZATIONS.inc()
+            REORG_DISCONNECTED.inc(len(old_blocks))
+            REORG_REINJECTED.inc(reinjected)
+            BLOCKS_CONNECTED.inc(len(new_blocks), source="reorganization")
+
+    def _evict_overspent(self, addresses: Iterable[str]):
+        """
+        Убирает из мемпула (и шаблона) транзакции отправителей, чьи ожидающие
+        списания больше нового баланса: например, та же сумма уже потрачена
+        в блоке другого узла. Уходят самые новые транзакции отправителя.
+        """
+        evicted = []
+        for sender in addresses:
+            pending = self.mempool.pending_spend(sender)
+            if not pending or sender in COINBASE_SENDERS:
+                continue
+            balance = self.state.get_balance(sender)
+            txids = self.mempool.sender_txids(sender)
+            while txids and balance - pending < -1e-12:
+                txid = txids.pop()
+                pending -= self.mempool.get(txid).amount
+                evicted.append(txid)
+
+        if evicted:
+            self.mempool.remove(evicted)
+            MEMPOOL_EVICTED.inc(len(evicted))
+
+    def _reinject(self, old_blocks: List[Block], new_blocks: List[Block]) -> int:
+        """
+        Транзакции отключённых блоков, не вошедшие в новую ветку,
+        заново принимаются в мемпул относительно нового состояния.
+        Награды отключённых блоков пропадают вместе с ними.
+        """
+        included = {tx.txid() for block in new_blocks for tx in block.transactions}
+        accepted = []
+        for block in old_blocks:
+            for tx in block.transactions:
+                if tx.sender in COINBASE_SENDERS:
+                    continue
+                txid = tx.txid()
+                if txid in included:
+                    continue
+                try:
+                    # подпись проверена при подключении блока
+                    self._admit(tx, txid, check_signature=False)
+                except ValueError:
+                    continue
+                accepted.append((txid, tx))
+
+        if accepted:
+            self.storage.add_mempool_many(accepted)
+        return len(accepted)
+
+    def find_fork_point(self, other_hashes: List[str]) -> int:
+        """
+        Количество общих блоков (от генезиса) у локальной и другой цепочки.
+        Общая часть — всегда префикс (блоки связаны хешами), поэтому бинарный поиск.
+        """
+        headers = self.chain.headers
+        lo, hi = 0, min(len(headers), len(other_hashes))
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if headers[mid - 1].hash == other_hashes[mid - 1]:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    def validate_branch(self, fork: int, new_blocks: List[Block], start: int = 0) -> bool:
+        """
+        Проверяет ветку, растущую из локального блока fork - 1.
+        start — сколько первых блоков ветки уже проверено (инкрементальная проверка).
+        """
+        if fork == 0:
+            return False  # генезис у каждого узла свой
+
+        headers = self.chain.headers
+
+        def header_at(height: int):
+            # выше точки расхождения предки берутся из самой ветки
+            return new_blocks[height - fork].header if height >= fork else headers[height]
+
+        previous = new_blocks[start - 1].header if start else headers[fork - 1]
+        return self.validator.validate_blocks(previous, new_blocks[start:], header_at)
+
     def is_chain_valid(self, chain: List[Block]) -> bool:
-        for i in range(1, len(chain)):
-            if not chain[i].is_valid(chain[i - 1]):
-                return False
-        return True
+        return self.validator.validate_chain(chain)
 
     # -------------------------
     # БАЛАНС
     # -------------------------
 
     def get_balance(self, address: str) -> float:
-        balance = 0.0
-
-        for block in self.chain:
-            for tx in block.transactions:
-                if tx.sender == address:
-                    balance -= tx.amount
-                if tx.receiver == address:
-                    balance += tx.amount
+        started = time.perf_counter()
+        # баланс берётся из индекса состояния, без прохода по цепочке
+        balance = self.state.get_balance(address)
+        BALANCE_SECONDS.observe(time.perf_counter() - started)
 
         # for tx in self.mempool:
         #     if tx.sender == address:
@@ -133,21 +465,101 @@ class Blockchain:
         # -------------------------
 
     def add_transaction(self, tx: SignedTransaction):
-        #тестовый режим
-        if tx.sender in ("0" * 64, "NETWORK"):
-            self.mempool.append(tx)
-            return
+        started = time.perf_counter()
+        try:
+            self._add_transaction(tx)
+        except ValueError:
+            TRANSACTIONS.inc(result="rejected")
+            raise
+        TRANSACTIONS.inc(result="accepted")
+        TX_ADMISSION_SECONDS.observe(time.perf_counter() - started)
+
+    def _add_transaction(self, tx: SignedTransaction):
+        txid = tx.txid()
+        # подпись — самая дорогая проверка, она не зависит от состояния
+        # и выполняется до блокировки
+        if self.verify_signatures and tx.sender not in COINBASE_SENDERS:
+            if not self.verifier.verify(tx):
+                raise ValueError("Invalid signature")
+
+        with self.lock:
+            self._admit(tx, txid, check_signature=False)
+            self.storage.add_mempool(txid, tx)
+            self._changed()
+
+    def add_transactions(self, txs: List[SignedTransaction]) -> List[Optional[str]]:
+        """
+        Пакетный приём: подписи проверяются одним пакетом вне блокировки,
+        баланс каждого отправителя читается один раз, мемпул и хранилище
+        обновляются под одной блокировкой. Транзакции пакета принимаются
+        по порядку, поэтому списания отправителя внутри пакета суммируются.
+        Возвращает причину отказа или None для каждой транзакции.
+        """
+        started = time.perf_counter()
+        txids = [tx.txid() for tx in txs]
+        errors: List[Optional[str]] = [None] * len(txs)
+        if self.verify_signatures:
+            for i, ok in enumerate(self.verifier.verify_batch(txs)):
+                if not ok:
+                    errors[i] = "Invalid signature"
+
+        accepted = []
+        with self.lock:
+            balances: Dict[str, float] = {}
+            for i, (tx, txid) in enumerate(zip(txs, txids)):
+                if errors[i] is not None:
+                    continue
+                try:
+                    self._admit(tx, txid, check_signature=False, balances=balances)
+                except ValueError as e:
+                    errors[i] = str(e)
+                    continue
+                accepted.append((txid, tx))
+
+            if accepted:
+                self.storage.add_mempool_many(accepted)
+                self._changed()
+
+        TRANSACTIONS.inc(len(accepted), result="accepted")
+        TRANSACTIONS.inc(len(txs) - len(accepted), result="rejected")
+        TX_BATCH_SECONDS.observe(time.perf_counter() - started)
+        return errors
+
+    def _admit(self, tx: SignedTransaction, txid: str, check_signature: bool = True,
+               balances: Optional[Dict[str, float]] = None):
+        """
+        Проверки приёма транзакции и добавление в мемпул (без записи в хранилище).
+        balances — общий для пакета кэш балансов отправителей.
+        """
+        if txid in self.mempool:
+            raise ValueError("Transaction already in mempool")
+
+        # coinbase создаёт только майнер в шаблоне блока,
+        # в блоке на другой позиции её отвергнет ChainValidator
+        if tx.sender in COINBASE_SENDERS:
+            raise ValueError("Coinbase transactions are not accepted")
+
+        if balances is None:
+            balance = self.get_balance(tx.sender)
+        elif tx.sender in balances:
+            balance = balances[tx.sender]
+        else:
+            balance = balances[tx.sender] = self.get_balance(tx.sender)
 
-        if self.get_balance(tx.sender) < tx.amount:
+        # учитываем списания, уже ожидающие в пуле
+        available = balance - self.mempool.pending_spend(tx.sender)
+        if available < tx.amount:
             raise ValueError("Insufficient balance")
-        # if not verify_signature(tx):
-        #     raise ValueError("Invalid signature")
+
+        if check_signature and self.verify_signatures and not self.verifier.verify(tx):
+            raise ValueError("Invalid signature")
         #
         # if tx.sender != "0" * 64:
         #     if self.get_balance(tx.sender) < tx.amount:
         #         raise ValueError("Insufficient balance")
 
-        self.mempool.append(tx)
+        self.mempool.add(tx, txid)
+        self.template.add(tx, txid)
         return
 
     # -------------------------
@@ -155,51 +567,99 @@ class Blockchain:
     # -------------------------
     def create_genesis_block(self):
         genesis = Block.create_genesis_block(self.difficulty)
-        self.chain.append(genesis)
+        self.storage.connect_block(0, genesis)
 
 
     def mine_block(self, miner_address: str) -> Block:
-        coinbase_tx = SignedTransaction(
-            sender="0" * 64,
-            receiver=miner_address,
-            amount=BLOCK_REWARD,
-            signature="COINBASE"
-        )
-
-        transactions = [coinbase_tx] + self.mempool
-        merkle_root = calculate_merkle_root(transactions)
-
-        previous_block = self.chain[-1]
-        index = len(self.chain)
-        nonce = 0
-
-        while True:
-            header = BlockHeader(
-                index=index,
-                previous_hash=previous_block.header.hash,
-                merkle_root=merkle_root,
-                timestamp=time.time(),
-                nonce=nonce,
-                difficulty=self.difficulty,
-                hash=""
+        for _ in range(MINING_ATTEMPTS):
+            # шаблон уже собран, под блокировкой он только копируется;
+            # перебор nonce идёт без неё
+            with self.lock:
+                self.template.set_miner(miner_address)
+                header, transactions, tree = self.template.build()
+                version = self._tip_version
+
+            # неизменная часть заголовка сериализуется один раз,
+            # перебор nonce идёт параллельно в пуле процессов
+            result = mine_header(
+                header_prefix(header), header.difficulty, workers=MINER_WORKERS,
+                should_stop=lambda: self._tip_version != version
+            )
+            if result is None:
+                MINING_RESTARTS.inc()
+                continue  # пришла новая вершина — шаблон устарел
+
+            header.nonce = result.nonce
+            header.hash = result.hash
+            block = Block(
+                header=header,
+                transactions=transactions,
             )
 
-            block_hash = sha256(json.dumps(header.dict(), sort_keys=True))
-            header.hash = block_hash
+            with self.lock:
+                if self._tip_version != version:
+                    MINING_RESTARTS.inc()
+                    continue
+                self.last_mining_stats = result
+                self._connect(block, source="mined")
+                self.merkle_trees.put(block.header.hash, tree)
+
+            MINING_SECONDS.observe(result.elapsed)
+            MINING_HASHRATE.set(result.hashrate)
+            MINING_HASHES.inc(result.hashes)
+            return block
+
+        raise ValueError("Chain tip keeps changing, mining aborted")
+
+    def next_difficulty(self) -> int:
+        """Сложность следующего блока поверх текущей вершины"""
+        return self.validator.next_difficulty(self.view().tip)
+
+    def mining_template(self, miner_address: str) -> dict:
+        """
+        Шаблон для внешнего майнера. Решение — nonce, при котором
+        sha256(header_prefix + nonce как u64 little-endian) как число
+        меньше target; присылается в submit_block вместе с template_id.
+        """
+        with self.lock:
+            self.template.set_miner(miner_address)
+            header, transactions, tree = self.template.build()
+            prefix = header_prefix(header)
+            template_id = hashlib.sha256(prefix).hexdigest()
+            self._issued[template_id] = (header, transactions, tree)
+            while len(self._issued) > ISSUED_TEMPLATES:
+                self._issued.popitem(last=False)
+
+        return {
+            "template_id": template_id,
+            "index": header.index,
+            "previous_hash": header.previous_hash,
+            "merkle_root": header.merkle_root,
+            "timestamp": header.timestamp,
+            "difficulty": header.difficulty,
+            "target": f"{target_for_difficulty(header.difficulty):064x}",
+            "header_prefix": prefix.hex(),
+            "miner_address": miner_address,
+            "transactions": len(transactions),
+        }
 
-            if block_hash.startswith("0" * self.difficulty):
-                break
+    def submit_block(self, template_id: str, nonce: int) -> Block:
+        """Подключает блок из выданного шаблона с найденным nonce"""
+        with self.lock:
+            issued = self._issued.get(template_id)
+            if issued is None:
+                raise StaleTemplateError("Unknown or stale template")
+            header, transactions, tree = issued
 
-            nonce += 1
+            header = header.model_copy(update={"nonce": nonce})
+            header.hash = header_hash(header)
+            if int(header.hash, 16) >= target_for_difficulty(header.difficulty):
+                raise ValueError("Insufficient proof of work")
 
-        block = Block(
-            header=header,
-            transactions=transactions,
-        )
-
-        self.chain.append(block)
-        self.mempool.clear()
-        return block
+            block = Block(header=header, transactions=transactions)
+            self._connect(block, source="submitted")
+            self.merkle_trees.put(block.header.hash, tree)
+            return block
 
     # -------------------------
     # ВАЛИДАЦИЯ
@@ -212,23 +672,22 @@ class Blockchain:
     # -------------------------
 
     def calculate_block_hash(self, index, header, transactions) -> str:
-        payload = {
-            "header": header.dict(),
-            "transactions": [tx.dict() for tx in transactions]
-        }
-
-        return sha256(json.dumps(payload, sort_keys=True))
+        # транзакции входят в хеш через merkle_root заголовка
+        return header.compute_hash()
 
 # ДОБАВИТЬ В КОНЕЦ Blockchain
 
     def get_headers(self):
+        # заголовки всегда в памяти, полные блоки не подгружаются
+        view = self.view()
         headers = []
-        for block in self.chain:
+        for header in view.headers[:view.height]:
             headers.append({
-                "index": block.header.index,
-                "previous_hash": block.header.previous_hash,
-                "hash": block.header.hash,
-                "nonce": block.header.nonce,
-                "difficulty": block.header.difficulty
+                "index": header.index,
+                "previous_hash": header.previous_hash,
+                "hash": header.hash,
+                "merkle_root": header.merkle_root,
+                "nonce": header.nonce,
+                "difficulty": header.difficulty
             })
         return headers
@@ -0,0 +1,37 @@
+"""
+Пересчёт сложности.
+
+Сложность — ожидаемое число хешей на блок: хеш блока как число
+должен быть меньше 2^256 / difficulty (node/miner.py). Каждые
+interval блоков сложность пересчитывается по меткам времени
+заголовков так, чтобы блоки шли с интервалом target_time.
+"""
+from typing import Callable
+
+from models.block import BlockHeader
+
+# Максимальное изменение сложности за один пересчёт (в обе стороны)
+MAX_ADJUSTMENT = 4
+
+
+def next_difficulty(previous: BlockHeader, header_at: Callable[[int], BlockHeader],
+                    interval: int, target_time: float, initial: int) -> int:
+    """
+    Сложность блока, следующего за previous.
+    header_at(height) — заголовок предка той же ветки.
+    Генезис у каждого узла свой, поэтому ни его сложность, ни метка
+    времени в расчёт не идут: блок 1 всегда со сложностью initial
+    (общая константа сети), первый пересчёт — на высоте 2 * interval.
+    """
+    if previous.index == 0:
+        return initial
+
+    height = previous.index + 1
+    if interval <= 0 or height % interval or height <= interval:
+        return previous.difficulty
+
+    first = header_at(height - 1 - interval)
+    expected = interval * target_time
+    actual = previous.timestamp - first.timestamp
+    actual = min(max(actual, expected / MAX_ADJUSTMENT), expected * MAX_ADJUSTMENT)
+    return max(1, int(previous.difficulty * expected / actual))
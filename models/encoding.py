@@ -0,0 +1,219 @@
+"""
+Компактная детерминированная бинарная сериализация транзакций,
+заголовков и блоков. Используется для хешей, хранения на диске
+и бинарного варианта ответов /chain и /blocks.
+
+Строка:     [u8 тип][u16 длина][байты] — тип 1: hex, хранится сырыми байтами
+Транзакция: строка sender, строка receiver, f64 amount, строка signature
+Заголовок:  u64 index, 32 байта previous_hash, 32 байта merkle_root,
+            f64 timestamp, u64 difficulty, u64 nonce, 32 байта hash
+Блок:       заголовок, u32 число транзакций, транзакции
+
+nonce стоит последним в хешируемой части заголовка, поэтому при майнинге
+всё, что до него, хешируется один раз.
+
+Поля вне диапазона при кодировании и обрезанные данные при декодировании
+дают ValueError, как и остальные ошибки проверки.
+"""
+import hashlib
+import struct
+from typing import Iterable, List, Tuple
+
+from models.block import Block, BlockHeader
+from models.transaction import SignedTransaction
+
+STR_UTF8 = 0
+STR_HEX = 1
+
+_STR_HEAD = struct.Struct("<BH")
+_AMOUNT = struct.Struct("<d")
+_HEADER_PREFIX = struct.Struct("<Q32s32sdQ")
+NONCE = struct.Struct("<Q")
+_COUNT = struct.Struct("<I")
+
+HEADER_SIZE = _HEADER_PREFIX.size + NONCE.size + 32
+
+
+def _encode_str(value: str) -> bytes:
+    kind, raw = STR_UTF8, value.encode()
+    if len(value) % 2 == 0:
+        try:
+            as_hex = bytes.fromhex(value)
+        except ValueError:
+            pass
+        else:
+            if as_hex.hex() == value:  # только если значение восстановится один в один
+                kind, raw = STR_HEX, as_hex
+    if len(raw) > 0xFFFF:
+        raise ValueError("string is too long to encode")
+    return _STR_HEAD.pack(kind, len(raw)) + raw
+
+
+def _decode_str(data, pos: int) -> Tuple[str, int]:
+    kind, length = _STR_HEAD.unpack_from(data, pos)
+    pos += _STR_HEAD.size
+    raw = bytes(data[pos:pos + length])
+    if len(raw) != length:
+        raise ValueError("Malformed string: truncated")
+    value = raw.hex() if kind == STR_HEX else raw.decode()
+    return value, pos + length
+
+
+def _hash_bytes(value: str) -> bytes:
+    raw = bytes.fromhex(value)
+    if len(raw) != 32:
+        raise ValueError("hash must be 32 bytes")
+    return raw
+
+
+# -------------------------
+# ТРАНЗАКЦИИ
+# -------------------------
+
+def encode_transaction(tx) -> bytes:
+    return (
+        _encode_str(tx.sender)
+        + _encode_str(tx.receiver)
+        + _AMOUNT.pack(tx.amount)
+        + _encode_str(tx.signature)
+    )
+
+
+def _decode_transaction(data, pos: int, trusted: bool):
+    sender, pos = _decode_str(data, pos)
+    receiver, pos = _decode_str(data, pos)
+    (amount,) = _AMOUNT.unpack_from(data, pos)
+    signature, pos = _decode_str(data, pos + _AMOUNT.size)
+
+    build = SignedTransaction.model_construct if trusted else SignedTransaction
+    return build(sender=sender, receiver=receiver, amount=amount, signature=signature), pos
+
+
+def decode_transaction(data, trusted: bool = False):
+    try:
+        return _decode_transaction(data, 0, trusted)[0]
+    except struct.error as e:
+        raise ValueError(f"Malformed transaction: {e}") from e
+
+
+def transaction_hash(tx) -> str:
+    return hashlib.sha256(encode_transaction(tx)).hexdigest()
+
+
+# -------------------------
+# ЗАГОЛОВКИ
+# -------------------------
+
+def header_prefix(header) -> bytes:
+    """Хешируемая часть заголовка до nonce"""
+    try:
+        return _HEADER_PREFIX.pack(
+            header.index,
+            _hash_bytes(header.previous_hash),
+            _hash_bytes(header.merkle_root),
+            header.timestamp,
+            header.difficulty,
+        )
+    except struct.error as e:
+        raise ValueError(f"Header field out of range: {e}") from e
+
+
+def _pack_nonce(nonce: int) -> bytes:
+    try:
+        return NONCE.pack(nonce)
+    except struct.error as e:
+        raise ValueError(f"Nonce out of range: {e}") from e
+
+
+def header_hash(header) -> str:
+    return hashlib.sha256(header_prefix(header) + _pack_nonce(header.nonce)).hexdigest()
+
+
+def encode_header(header) -> bytes:
+    return header_prefix(header) + _pack_nonce(header.nonce) + _hash_bytes(header.hash)
+
+
+def unpack_header(data, pos: int = 0) -> tuple:
+    """
+    Поля заголовка без сборки модели, хеши — сырыми байтами:
+    (index, previous_hash, merkle_root, timestamp, nonce, difficulty, hash)
+    """
+    index, previous_hash, merkle_root, timestamp, difficulty = _HEADER_PREFIX.unpack_from(data, pos)
+    pos += _HEADER_PREFIX.size
+    (nonce,) = NONCE.unpack_from(data, pos)
+    pos += NONCE.size
+    return index, previous_hash, merkle_root, timestamp, nonce, difficulty, bytes(data[pos:pos + 32])
+
+
+def _decode_header(data, pos: int, trusted: bool):
+    index, previous_hash, merkle_root, timestamp, nonce, difficulty, block_hash = unpack_header(data, pos)
+
+    build = BlockHeader.model_construct if trusted else BlockHeader
+    header = build(
+        index=index,
+        previous_hash=previous_hash.hex(),
+        merkle_root=merkle_root.hex(),
+        timestamp=timestamp,
+        nonce=nonce,
+        difficulty=difficulty,
+        hash=block_hash.hex(),
+    )
+    return header, pos + HEADER_SIZE
+
+
+def decode_header(data, trusted: bool = False):
+    try:
+        return _decode_header(data, 0, trusted)[0]
+    except struct.error as e:
+        raise ValueError(f"Malformed header: {e}") from e
+
+
+# -------------------------
+# БЛОКИ
+# -------------------------
+
+def encode_block(block) -> bytes:
+    parts = [encode_header(block.header), _COUNT.pack(len(block.transactions))]
+    parts.extend(encode_transaction(tx) for tx in block.transactions)
+    return b"".join(parts)
+
+
+def decode_block(data, trusted: bool = False):
+    try:
+        header, pos = _decode_header(data, 0, trusted)
+        (count,) = _COUNT.unpack_from(data, pos)
+        pos += _COUNT.size
+
+        transactions = []
+        for _ in range(count):
+            tx, pos = _decode_transaction(data, pos, trusted)
+            transactions.append(tx)
+    except struct.error as e:
+        raise ValueError(f"Malformed block: {e}") from e
+
+    if trusted:
+        return Block.model_construct(header=header, transactions=transactions)
+    return Block(header=header, transactions=transactions)
+
+
+def encode_blocks(blocks: Iterable) -> bytes:
+    """Последовательность блоков: [u32 длина][блок]..."""
+    parts = []
+    for block in blocks:
+        encoded = encode_block(block)
+        parts.append(_COUNT.pack(len(encoded)))
+        parts.append(encoded)
+    return b"".join(parts)
+
+
+def decode_blocks(data, trusted: bool = False) -> List:
+    blocks = []
+    pos = 0
+    while pos < len(data):
+        if pos + _COUNT.size > len(data):
+            raise ValueError("Malformed block list: truncated length")
+        (length,) = _COUNT.unpack_from(data, pos)
+        pos += _COUNT.size
+        blocks.append(decode_block(memoryview(data)[pos:pos + length], trusted))
+        pos += length
+    return blocks
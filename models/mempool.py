@@ -0,0 +1,96 @@
+import itertools
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from models.transaction import SignedTransaction
+
+
+class Mempool:
+    """
+    Пул неподтверждённых транзакций:
+    - индекс txid -> tx для отсева дубликатов;
+    - сумма ожидающих списаний и транзакции по отправителю, чтобы ловить
+      двойную трату между транзакциями в пуле без прохода по цепочке;
+    - ограничение размера: в заполненный пул новые транзакции не принимаются;
+    - выбор N транзакций для блока в порядке прихода (поля комиссии
+      в транзакциях нет, приоритета тоже).
+    """
+
+    def __init__(self, max_size: int = 10000,
+                 on_remove: Optional[Callable[[List[str]], None]] = None):
+        self.max_size = max_size
+        # вызывается с txid удалённых транзакций (включены в блок или вытеснены)
+        self.on_remove = on_remove
+        self._txs: Dict[str, SignedTransaction] = {}
+        self._pending: Dict[str, float] = {}
+        # отправитель -> его txid в порядке прихода
+        self._by_sender: Dict[str, Dict[str, None]] = {}
+
+    # -------------------------
+    # ЧТЕНИЕ
+    # -------------------------
+
+    def __len__(self) -> int:
+        return len(self._txs)
+
+    def __contains__(self, txid: str) -> bool:
+        return txid in self._txs
+
+    def __iter__(self):
+        return iter(list(self._txs.values()))
+
+    def get(self, txid: str) -> Optional[SignedTransaction]:
+        return self._txs.get(txid)
+
+    def pending_spend(self, sender: str) -> float:
+        return self._pending.get(sender, 0.0)
+
+    def sender_txids(self, sender: str) -> List[str]:
+        """Транзакции отправителя в пуле в порядке прихода"""
+        return list(self._by_sender.get(sender, ()))
+
+    def best(self, limit: int) -> List[Tuple[str, SignedTransaction]]:
+        """Первые limit пар (txid, tx) для шаблона блока"""
+        return list(itertools.islice(self._txs.items(), limit))
+
+    # -------------------------
+    # ИЗМЕНЕНИЕ
+    # -------------------------
+
+    def add(self, tx: SignedTransaction, txid: Optional[str] = None) -> str:
+        txid = txid or tx.txid()
+        if txid in self._txs:
+            raise ValueError("Transaction already in mempool")
+
+        if len(self._txs) >= self.max_size:
+            raise ValueError("Mempool is full")
+
+        self._txs[txid] = tx
+        self._pending[tx.sender] = self._pending.get(tx.sender, 0.0) + tx.amount
+        self._by_sender.setdefault(tx.sender, {})[txid] = None
+        return txid
+
+    def remove(self, txids: Iterable[str]):
+        removed = []
+        for txid in txids:
+            tx = self._txs.pop(txid, None)
+            if tx is None:
+                continue
+            removed.append(txid)
+
+            left = self._pending.get(tx.sender, 0.0) - tx.amount
+            if left > 1e-12:
+                self._pending[tx.sender] = left
+            else:
+                self._pending.pop(tx.sender, None)
+
+            txids = self._by_sender[tx.sender]
+            del txids[txid]
+            if not txids:
+                del self._by_sender[tx.sender]
+
+        if removed and self.on_remove is not None:
+            self.on_remove(removed)
+
+    def remove_included(self, transactions: Iterable[SignedTransaction]):
+        """Убирает из пула транзакции, попавшие в блок"""
+        self.remove(tx.txid() for tx in transactions)
@@ -0,0 +1,164 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+from models.transaction import SignedTransaction
+
+
+def sha256(data: str) -> str:
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(left + right).digest()
+
+
+def tx_leaf(tx: SignedTransaction) -> bytes:
+    # лист дерева — txid транзакции в виде сырых 32 байт
+    return bytes.fromhex(tx.txid())
+
+
+class MerkleTree:
+    """
+    Дерево Меркла со всеми промежуточными уровнями.
+    Нечётный последний узел уровня хешируется сам с собой (как раньше
+    в calculate_merkle_root), но копия в уровень не добавляется —
+    поэтому append и update пересчитывают только путь до корня, O(log n).
+    """
+
+    def __init__(self, leaves: Iterable[bytes] = ()):
+        self.levels: List[List[bytes]] = [list(leaves)]
+        level = self.levels[0]
+        while len(level) > 1:
+            level = [
+                _node(level[i], level[i + 1] if i + 1 < len(level) else level[i])
+                for i in range(0, len(level), 2)
+            ]
+            self.levels.append(level)
+
+    @classmethod
+    def from_transactions(cls, transactions: Iterable[SignedTransaction]) -> "MerkleTree":
+        return cls(tx_leaf(tx) for tx in transactions)
+
+    def __len__(self) -> int:
+        return len(self.levels[0])
+
+    @property
+    def root(self) -> str:
+        if not self.levels[0]:
+            return sha256("")
+        return self.levels[-1][0].hex()
+
+    # -------------------------
+    # ИНКРЕМЕНТАЛЬНЫЕ ИЗМЕНЕНИЯ
+    # -------------------------
+
+    def _update_path(self, position: int):
+        level = 0
+        while len(self.levels[level]) > 1:
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+
+            nodes = self.levels[level]
+            parent = position // 2
+            left = nodes[2 * parent]
+            right = nodes[2 * parent + 1] if 2 * parent + 1 < len(nodes) else left
+
+            upper = self.levels[level + 1]
+            if parent < len(upper):
+                upper[parent] = _node(left, right)
+            else:
+                upper.append(_node(left, right))
+
+            position = parent
+            level += 1
+
+    def append(self, leaf: bytes):
+        self.levels[0].append(leaf)
+        self._update_path(len(self.levels[0]) - 1)
+
+    def update(self, position: int, leaf: bytes):
+        self.levels[0][position] = leaf
+        self._update_path(position)
+
+    def pop(self) -> bytes:
+        """Убирает последний лист"""
+        leaf = self.levels[0].pop()
+        for level in range(1, len(self.levels)):
+            del self.levels[level][(len(self.levels[level - 1]) + 1) // 2:]
+        while len(self.levels) > 1 and len(self.levels[-2]) <= 1:
+            self.levels.pop()
+        if self.levels[0]:
+            self._update_path(len(self.levels[0]) - 1)
+        return leaf
+
+    def copy(self) -> "MerkleTree":
+        tree = MerkleTree()
+        tree.levels = [list(level) for level in self.levels]
+        return tree
+
+    # -------------------------
+    # ДОКАЗАТЕЛЬСТВА ВКЛЮЧЕНИЯ
+    # -------------------------
+
+    def proof(self, position: int) -> List[dict]:
+        """Соседние хеши от листа до корня: [{"hash": hex, "position": "left"|"right"}]"""
+        path = []
+        for nodes in self.levels[:-1]:
+            sibling = position ^ 1
+            if sibling >= len(nodes):
+                sibling = position  # нечётный узел хешируется сам с собой
+            path.append({
+                "hash": nodes[sibling].hex(),
+                "position": "left" if sibling < position else "right"
+            })
+            position //= 2
+        return path
+
+
+def verify_proof(txid: str, proof: List[dict], merkle_root: str) -> bool:
+    current = bytes.fromhex(txid)
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        if step["position"] == "left":
+            current = _node(sibling, current)
+        else:
+            current = _node(current, sibling)
+    return current.hex() == merkle_root
+
+
+def calculate_merkle_root(transactions: List[SignedTransaction]) -> str:
+    return MerkleTree.from_transactions(transactions).root
+
+
+class MerkleTreeCache:
+    """
+    LRU деревьев Меркла по хешу блока; дерево строится лениво при первом запросе.
+    Читатели и писатель обращаются к кэшу из разных потоков.
+    """
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self._trees: "OrderedDict[str, MerkleTree]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, block) -> MerkleTree:
+        with self._lock:
+            tree = self._trees.get(block.header.hash)
+        if tree is None:
+            # дерево строится вне блокировки
+            tree = MerkleTree.from_transactions(block.transactions)
+        self.put(block.header.hash, tree)
+        return tree
+
+    def put(self, block_hash: str, tree: MerkleTree):
+        with self._lock:
+            self._trees[block_hash] = tree
+            self._trees.move_to_end(block_hash)
+            while len(self._trees) > self.max_size:
+                self._trees.popitem(last=False)
+
+    def discard(self, block_hash: str) -> Optional[MerkleTree]:
+        with self._lock:
+            return self._trees.pop(block_hash, None)
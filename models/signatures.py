@@ -0,0 +1,112 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import multiprocessing as mp
+from typing import List, Optional, Sequence, Tuple
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.exceptions import InvalidSignature
+
+from models.transaction import SignedTransaction
+
+COINBASE_SENDERS = ("0" * 64, "NETWORK")
+
+
+def tx_payload(tx: SignedTransaction) -> bytes:
+    """
+    Данные, которые реально подписываются
+    """
+    payload = {
+        "sender": tx.sender,
+        "receiver": tx.receiver,
+        "amount": tx.amount,
+    }
+    return json.dumps(payload, sort_keys=True).encode()
+
+
+@lru_cache(maxsize=65536)
+def load_public_key(sender: str) -> ec.EllipticCurvePublicKey:
+    """Разбор публичного ключа из hex кэшируется по отправителю"""
+    raw = bytes.fromhex(sender)
+    if len(raw) == 64:
+        raw = b"\x04" + raw  # ключ без префикса несжатой точки
+    return ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256K1(), raw)
+
+
+def verify_payload(sender: str, signature: str, payload: bytes) -> bool:
+    """ECDSA(SHA256) подпись в DER/hex над payload от ключа sender"""
+    try:
+        load_public_key(sender).verify(
+            bytes.fromhex(signature),
+            payload,
+            ec.ECDSA(hashes.SHA256())
+        )
+        return True
+
+    except (ValueError, TypeError, InvalidSignature):
+        return False
+
+
+def verify_signature(tx: SignedTransaction) -> bool:
+    if tx.sender in COINBASE_SENDERS:
+        return True  # coinbase
+
+    return verify_payload(tx.sender, tx.signature, tx_payload(tx))
+
+
+def _verify_chunk(items: Sequence[Tuple[str, str, bytes]]) -> List[bool]:
+    # выполняется в процессе пула, у каждого процесса свой кэш ключей
+    return [verify_payload(sender, signature, payload) for sender, signature, payload in items]
+
+
+class SignatureVerifier:
+    """
+    Пакетная проверка подписей. Маленькие пакеты проверяются в текущем
+    потоке, большие делятся на части и проверяются в пуле процессов.
+    """
+
+    def __init__(self, workers: int = 1, batch_threshold: int = 64):
+        self.workers = workers
+        self.batch_threshold = batch_threshold
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=mp.get_context("spawn")
+            )
+        return self._executor
+
+    def verify(self, tx: SignedTransaction) -> bool:
+        return verify_signature(tx)
+
+    def verify_batch(self, txs: Sequence[SignedTransaction]) -> List[bool]:
+        results = [True] * len(txs)
+        positions = []
+        items = []
+        for i, tx in enumerate(txs):
+            if tx.sender in COINBASE_SENDERS:
+                continue
+            positions.append(i)
+            items.append((tx.sender, tx.signature, tx_payload(tx)))
+
+        if self.workers <= 1 or len(items) < self.batch_threshold:
+            checked = _verify_chunk(items)
+        else:
+            size = -(-len(items) // self.workers)
+            chunks = [items[i:i + size] for i in range(0, len(items), size)]
+            checked = [ok for part in self._get_executor().map(_verify_chunk, chunks) for ok in part]
+
+        for i, ok in zip(positions, checked):
+            results[i] = ok
+        return results
+
+    def verify_all(self, txs: Sequence[SignedTransaction]) -> bool:
+        return all(self.verify_batch(txs))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,94 @@
+"""
+Снимки производного состояния: балансы на высоте height
+вместе с хешем вершины и содержимым мемпула.
+
+При старте состояние восстанавливается из снимка, и по блокам
+доигрывается только хвост после него, поэтому время запуска
+ограничено интервалом снимков, а не высотой цепочки.
+
+Принудительный снимок из командной строки (хранилище открывает
+только работающий узел, команда обращается к его POST /admin/snapshot):
+    python -m models.snapshot                        # записать снимок
+    python -m models.snapshot --node 127.0.0.1:8001  # у другого узла
+    python -m models.snapshot --show                 # показать сохранённый
+"""
+import argparse
+import json
+import os
+from typing import Optional
+
+from blockstore import fsync_dir
+
+SNAPSHOT_VERSION = 1
+
+
+def take_snapshot(blockchain) -> dict:
+    height = blockchain.state.height
+    return {
+        "version": SNAPSHOT_VERSION,
+        "height": height,
+        "tip_hash": blockchain.chain.headers[height - 1].hash,
+        "balances": dict(blockchain.state.balances),
+        "mempool": [tx.model_dump() for tx in blockchain.mempool]
+    }
+
+
+def write_snapshot(snapshot: dict, path: str):
+    """Атомарная запись: временный файл, fsync, os.replace"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    fsync_dir(directory)
+
+
+def read_snapshot(path: str) -> Optional[dict]:
+    """Снимок или None, если файла нет или он не читается"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    return snapshot
+
+
+def main():
+    from node.config import MY_NETWORK_ADDRESS
+    from persistence import SNAPSHOT_FILE
+
+    parser = argparse.ArgumentParser(description="Снимок состояния узла")
+    parser.add_argument("--path", default=SNAPSHOT_FILE, help="файл снимка для --show")
+    parser.add_argument("--node", default=MY_NETWORK_ADDRESS, help="адрес работающего узла")
+    parser.add_argument("--show", action="store_true", help="показать сохранённый снимок")
+    args = parser.parse_args()
+
+    if args.show:
+        snapshot = read_snapshot(args.path)
+        if snapshot is None:
+            raise SystemExit(f"no snapshot at {args.path}")
+        print(json.dumps({
+            "height": snapshot["height"],
+            "tip_hash": snapshot["tip_hash"],
+            "addresses": len(snapshot["balances"]),
+            "mempool": len(snapshot["mempool"])
+        }, indent=2))
+        return
+
+    import httpx
+    try:
+        resp = httpx.post(f"http://{args.node}/admin/snapshot", timeout=60)
+        resp.raise_for_status()
+    except httpx.HTTPError as e:
+        raise SystemExit(f"node {args.node} did not write a snapshot: {e}")
+    snapshot = resp.json()
+    print(f"snapshot at height {snapshot['height']} written by node {args.node}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+from typing import Dict, Iterable, Optional
+
+from models.block import Block
+
+
+class StateIndex:
+    """
+    Индекс состояния аккаунтов: address -> balance.
+    Обновляется при подключении/отключении блоков, поэтому
+    баланс читается за O(1) без прохода по всей цепочке.
+    """
+
+    def __init__(self):
+        self.balances: Dict[str, float] = {}
+        self.height = 0  # сколько блоков применено к состоянию
+
+    def get_balance(self, address: str) -> float:
+        return self.balances.get(address, 0.0)
+
+    def _apply(self, deltas: Dict[str, float]):
+        # каждый баланс записывается один раз — читатель из другого потока
+        # не видит промежуточных значений внутри блока
+        balances = self.balances
+        for address, delta in deltas.items():
+            balances[address] = balances.get(address, 0.0) + delta
+
+    @staticmethod
+    def _deltas(block: Block, sign: float) -> Dict[str, float]:
+        deltas: Dict[str, float] = {}
+        for tx in block.transactions:
+            deltas[tx.sender] = deltas.get(tx.sender, 0.0) - sign * tx.amount
+            deltas[tx.receiver] = deltas.get(tx.receiver, 0.0) + sign * tx.amount
+        return deltas
+
+    def apply_block(self, block: Block):
+        # высота меняется до балансов: читатель без блокировки
+        # (ChainView.balance) по ней видит, что блок применяется
+        self.height += 1
+        self._apply(self._deltas(block, 1.0))
+
+    def revert_block(self, block: Block):
+        self._apply(self._deltas(block, -1.0))
+        self.height -= 1
+
+    def undo_data(self, block: Block) -> Dict[str, Optional[float]]:
+        """Балансы адресов блока до его применения (None — адреса ещё не было)"""
+        return {
+            address: self.balances.get(address)
+            for tx in block.transactions
+            for address in (tx.sender, tx.receiver)
+        }
+
+    def undo_block(self, undo: Dict[str, Optional[float]]):
+        """
+        Откат блока по данным undo_data: балансы восстанавливаются
+        точно, без ошибки округления обратных дельт
+        """
+        balances = self.balances
+        for address, balance in undo.items():
+            if balance is None:
+                balances.pop(address, None)
+            else:
+                balances[address] = balance
+        self.height -= 1
+
+    def copy(self) -> "StateIndex":
+        state = StateIndex()
+        state.load(self.balances, self.height)
+        return state
+
+    def touched(self, blocks: Iterable[Block]) -> Dict[str, Optional[float]]:
+        """
+        Текущие балансы адресов, затронутых блоками (для записи в хранилище);
+        None — адреса больше нет (удалён откатом undo_block)
+        """
+        return {
+            address: self.balances.get(address)
+            for block in blocks
+            for tx in block.transactions
+            for address in (tx.sender, tx.receiver)
+        }
+
+    def load(self, balances: Dict[str, float], height: int):
+        self.balances = dict(balances)
+        self.height = height
@@ -0,0 +1,129 @@
+"""
+Шаблон следующего блока, который поддерживается инкрементально.
+
+Транзакции попадают в шаблон и уходят из него вместе с мемпулом,
+дерево Меркла при этом пересчитывает только путь до корня; смена
+вершины меняет лишь поля заголовка, смена адреса майнера — лист
+coinbase. Сборка блока для перебора nonce — копирование готовых
+списков, без обхода мемпула и пересчёта корня.
+"""
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from models.block import BlockHeader
+from models.mempool import Mempool
+from models.merkle import MerkleTree
+from models.transaction import SignedTransaction
+from node.config import BLOCK_REWARD
+
+COINBASE_SENDER = "0" * 64
+
+
+class StaleTemplateError(ValueError):
+    """Шаблон неизвестен или вершина цепочки уже сменилась"""
+
+
+def coinbase_transaction(miner_address: str) -> SignedTransaction:
+    return SignedTransaction(
+        sender=COINBASE_SENDER,
+        receiver=miner_address,
+        amount=BLOCK_REWARD,
+        signature="COINBASE"
+    )
+
+
+class BlockTemplate:
+    """
+    Coinbase всегда на позиции 0, за ней транзакции мемпула.
+    Удалённая транзакция заменяется последней (порядок транзакций
+    в блоке не важен), так что удаление тоже O(log n).
+    Все методы вызываются под блокировкой записи Blockchain.
+    """
+
+    def __init__(self, mempool: Mempool, previous: BlockHeader, difficulty: int,
+                 miner_address: str, max_transactions: int):
+        self.mempool = mempool
+        self.max_transactions = max_transactions
+        self.previous = previous
+        self.difficulty = difficulty
+        self.miner_address = miner_address
+        coinbase = coinbase_transaction(miner_address)
+        self.transactions: List[SignedTransaction] = [coinbase]
+        self.tree = MerkleTree([bytes.fromhex(coinbase.txid())])
+        self._positions: Dict[str, int] = {}
+        self.fill()
+
+    def __len__(self) -> int:
+        """Транзакции мемпула в шаблоне (без coinbase)"""
+        return len(self.transactions) - 1
+
+    def __contains__(self, txid: str) -> bool:
+        return txid in self._positions
+
+    # -------------------------
+    # ИЗМЕНЕНИЯ
+    # -------------------------
+
+    def add(self, tx: SignedTransaction, txid: str) -> bool:
+        # мемпул выдаёт транзакции в порядке прихода,
+        # поэтому в заполненный шаблон новая не попадает
+        if len(self) >= self.max_transactions or txid in self._positions:
+            return False
+        self._positions[txid] = len(self.transactions)
+        self.transactions.append(tx)
+        self.tree.append(bytes.fromhex(txid))
+        return True
+
+    def remove(self, txids: Iterable[str]):
+        for txid in txids:
+            position = self._positions.pop(txid, None)
+            if position is None:
+                continue
+            last = len(self.transactions) - 1
+            if position != last:
+                leaf = self.tree.levels[0][last]
+                self.transactions[position] = self.transactions[last]
+                self._positions[leaf.hex()] = position
+                self.tree.update(position, leaf)
+            self.transactions.pop()
+            self.tree.pop()
+
+    def fill(self):
+        """Добирает транзакции из мемпула, если после удалений освободилось место"""
+        if len(self) >= self.max_transactions or len(self.mempool) <= len(self):
+            return
+        for txid, tx in self.mempool.best(self.max_transactions):
+            if txid not in self._positions and not self.add(tx, txid):
+                break
+
+    def set_tip(self, previous: BlockHeader, difficulty: int):
+        self.previous = previous
+        self.difficulty = difficulty
+
+    def set_miner(self, miner_address: str):
+        if miner_address == self.miner_address:
+            return
+        coinbase = coinbase_transaction(miner_address)
+        self.transactions[0] = coinbase
+        self.tree.update(0, bytes.fromhex(coinbase.txid()))
+        self.miner_address = miner_address
+
+    # -------------------------
+    # СБОРКА
+    # -------------------------
+
+    def build(self) -> Tuple[BlockHeader, List[SignedTransaction], MerkleTree]:
+        """Заголовок без nonce и копии транзакций и дерева для перебора"""
+        self.fill()
+        previous = self.previous
+        header = BlockHeader(
+            index=previous.index + 1,
+            previous_hash=previous.hash,
+            merkle_root=self.tree.root,
+            # метки времени не убывают, даже если часы пира спешат
+            timestamp=max(time.time(), previous.timestamp),
+            nonce=0,
+            difficulty=self.difficulty,
+            hash=""
+        )
+        return header, list(self.transactions), self.tree.copy()
@@ -1,7 +1,16 @@
 from pydantic import BaseModel, Field
 
+# длина строки в бинарной сериализации — u16 (models/encoding.py);
+# адреса и подписи кошелька заметно короче
+MAX_FIELD_LENGTH = 1024
+
 class SignedTransaction(BaseModel):
-    sender: str = Field(..., description="Public key / address отправителя")
-    receiver: str = Field(..., description="Адрес получателя")
+    sender: str = Field(..., max_length=MAX_FIELD_LENGTH, description="Public key / address отправителя")
+    receiver: str = Field(..., max_length=MAX_FIELD_LENGTH, description="Адрес получателя")
     amount: float = Field(..., gt=0)
-    signature: str = Field(..., description="ECDSA signature (hex)")
\ No newline at end of file
+    signature: str = Field(..., max_length=MAX_FIELD_LENGTH, description="ECDSA signature (hex)")
+
+    def txid(self) -> str:
+        """Хеш бинарной сериализации транзакции — он же лист дерева Меркла"""
+        from models.encoding import transaction_hash  # encoding импортирует эту модель
+        return transaction_hash(self)
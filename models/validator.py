@@ -0,0 +1,203 @@
+import multiprocessing as mp
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Sequence
+
+from models.block import Block, BlockHeader
+from models.difficulty import next_difficulty
+from models.merkle import calculate_merkle_root
+from models.signatures import COINBASE_SENDERS, SignatureVerifier
+from node.config import BLOCK_REWARD
+from node.miner import target_for_difficulty
+
+GENESIS_HASH = "0" * 64
+COINBASE_SENDER = "0" * 64
+# Насколько метка времени блока может опережать часы узла (сек)
+MAX_FUTURE_DRIFT = 2 * 60 * 60
+
+
+def check_block(block: Block, difficulty: int) -> Optional[str]:
+    """
+    Проверки, не зависящие от соседних блоков.
+    Возвращает причину отказа или None.
+    """
+    header = block.header
+    if header.difficulty != difficulty:
+        return "Unexpected difficulty"
+
+    if header.compute_hash() != header.hash:
+        return "Invalid block hash"
+
+    if int(header.hash, 16) >= target_for_difficulty(difficulty):
+        return "Insufficient proof of work"
+
+    if calculate_merkle_root(block.transactions) != header.merkle_root:
+        return "Invalid merkle root"
+
+    # единственная эмиссия — награда "0"*64 на позиции 0; "NETWORK" в блоках не принимается
+    for position, tx in enumerate(block.transactions):
+        if tx.sender in COINBASE_SENDERS and (
+                position != 0 or tx.sender != COINBASE_SENDER or tx.amount > BLOCK_REWARD):
+            return "Invalid coinbase"
+
+    return None
+
+
+def _check_chunk(blocks: Sequence[Block], difficulties: Sequence[int]) -> List[Optional[str]]:
+    # выполняется в процессе пула
+    return [check_block(block, difficulty) for block, difficulty in zip(blocks, difficulties)]
+
+
+class ChainValidator:
+    """
+    Единая проверка блоков и цепочек:
+    - хеш заголовка пересчитывается в той же канонической форме, что при майнинге;
+    - корень Меркла сверяется с транзакциями;
+    - сложность каждого блока должна совпасть с пересчитанной по его предкам;
+    - хеши уже проверенных и подключённых блоков запоминаются,
+      и общий с ними префикс кандидата не проверяется повторно;
+    - независимые проверки длинных цепочек идут частями в пуле процессов.
+    """
+
+    def __init__(self, retarget_interval: int, target_block_time: float, initial_difficulty: int,
+                 verifier: Optional[SignatureVerifier] = None,
+                 workers: int = 1, chunk_size: int = 256, cache_size: int = 100000,
+                 header_at: Optional[Callable[[int], BlockHeader]] = None):
+        self.retarget_interval = retarget_interval
+        self.target_block_time = target_block_time
+        # сложность блока 1 и всех блоков до первого пересчёта
+        self.initial_difficulty = initial_difficulty
+        # заголовки локальной цепочки по высоте — для окна пересчёта сложности
+        self.header_at = header_at
+        self.verifier = verifier
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self._validated: "OrderedDict[str, None]" = OrderedDict()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    # -------------------------
+    # ПАМЯТЬ ПРОВЕРЕННЫХ БЛОКОВ
+    # -------------------------
+
+    def is_validated(self, block_hash: str) -> bool:
+        return block_hash in self._validated
+
+    def remember(self, block_hash: str):
+        self._validated[block_hash] = None
+        self._validated.move_to_end(block_hash)
+        while len(self._validated) > self.cache_size:
+            self._validated.popitem(last=False)
+
+    def forget(self, block_hash: str):
+        self._validated.pop(block_hash, None)
+
+    # -------------------------
+    # ПРОВЕРКИ
+    # -------------------------
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=mp.get_context("spawn")
+            )
+        return self._executor
+
+    def next_difficulty(self, previous: BlockHeader,
+                        header_at: Optional[Callable[[int], BlockHeader]] = None) -> int:
+        return next_difficulty(
+            previous, header_at or self.header_at,
+            self.retarget_interval, self.target_block_time, self.initial_difficulty
+        )
+
+    def _check_blocks(self, blocks: Sequence[Block], difficulties: Sequence[int]) -> bool:
+        if self.workers <= 1 or len(blocks) <= self.chunk_size:
+            errors = _check_chunk(blocks, difficulties)
+        else:
+            futures = [
+                self._get_executor().submit(
+                    _check_chunk,
+                    blocks[i:i + self.chunk_size],
+                    difficulties[i:i + self.chunk_size]
+                )
+                for i in range(0, len(blocks), self.chunk_size)
+            ]
+            errors = [error for future in futures for error in future.result()]
+
+        if any(errors):
+            return False
+
+        if self.verifier is not None:
+            transactions = [tx for block in blocks for tx in block.transactions]
+            return self.verifier.verify_all(transactions)
+        return True
+
+    def validate_block(self, block: Block, previous: BlockHeader) -> bool:
+        """Один блок поверх известного заголовка previous"""
+        return self.validate_blocks(previous, [block])
+
+    def validate_blocks(self, previous: BlockHeader, blocks: Sequence[Block],
+                        header_at: Optional[Callable[[int], BlockHeader]] = None) -> bool:
+        """
+        Ветка blocks, растущая из заголовка previous.
+        header_at — предки ниже ветки (по умолчанию локальная цепочка).
+        """
+        if not blocks:
+            return True
+
+        base = previous.index + 1
+        lookup = header_at or self.header_at
+
+        def ancestor(height: int) -> BlockHeader:
+            if height >= base:
+                return blocks[height - base].header
+            return lookup(height)
+
+        # связность, время и сложность дешёвые — проверяются
+        # последовательно и до тяжёлых проверок
+        latest = time.time() + MAX_FUTURE_DRIFT
+        difficulties = []
+        for block in blocks:
+            header = block.header
+            if header.index != previous.index + 1:
+                return False
+            if header.previous_hash != previous.hash:
+                return False
+            # метка времени генезиса своя у каждого узла — с ней не сравниваем
+            if header.timestamp > latest:
+                return False
+            if previous.index > 0 and header.timestamp < previous.timestamp:
+                return False
+            difficulties.append(self.next_difficulty(previous, ancestor))
+            previous = header
+
+        return self._check_blocks(blocks, difficulties)
+
+    def validate_chain(self, chain: Sequence[Block]) -> bool:
+        """Цепочка целиком, начиная с генезиса"""
+        if not chain:
+            return False
+
+        genesis = chain[0].header
+        if genesis.index != 0 or genesis.hash != GENESIS_HASH:
+            return False
+
+        # префикс, уже проверенный ранее, пропускаем
+        start = 1
+        while start < len(chain) and self.is_validated(chain[start].header.hash):
+            if chain[start].header.previous_hash != chain[start - 1].header.hash:
+                return False
+            start += 1
+
+        if start == len(chain):
+            return True
+        return self.validate_blocks(
+            chain[start - 1].header, chain[start:], lambda height: chain[height].header
+        )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
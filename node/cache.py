@@ -0,0 +1,166 @@
+"""
+Кэш ответов читающих эндпоинтов, привязанный к вершине цепочки.
+
+/chain, /chain/headers и /balance меняются только с новым блоком,
+поэтому ответы хранятся готовыми байтами. ETag — хеш вершины и
+параметров запроса, так что If-None-Match проверяется без сборки
+ответа. Записи другой вершины (новый блок или реорганизация)
+сбрасываются разом; список заголовков при этом не пересобирается,
+а дописывается с высоты, где новая цепочка расходится со старой.
+"""
+import hashlib
+import json
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from models.chain import ChainView
+from models.compact import HeaderList
+from node import metrics
+
+JSON = "application/json"
+
+CACHE_REQUESTS = metrics.counter(
+    "node_response_cache_requests_total", "Cacheable read requests by cache outcome",
+    ("endpoint", "result")
+)
+HEADERS_SERIALIZED = metrics.counter(
+    "node_response_cache_headers_serialized_total", "Block headers serialized for GET /chain/headers"
+)
+
+
+def json_bytes(content) -> bytes:
+    # так же, как JSONResponse FastAPI
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def tip_key(view: ChainView) -> str:
+    return view.tip.hash if view.height else ""
+
+
+def make_etag(tip: str, key: Tuple) -> str:
+    digest = hashlib.sha256(repr((tip,) + key).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Слабое сравнение, как требуется для If-None-Match"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    Готовые тела ответов одной вершины цепочки: ключ — эндпоинт и
+    параметры запроса, вытеснение LRU по числу записей и их размеру.
+    Запрос с другой вершиной сбрасывает все записи.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._tip: Optional[str] = None
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _switch(self, tip: str):
+        if tip != self._tip:
+            self._entries.clear()
+            self._size = 0
+            self._tip = tip
+
+    def get(self, tip: str, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            self._switch(tip)
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+        CACHE_REQUESTS.inc(endpoint=key[0], result="miss" if body is None else "hit")
+        return body
+
+    def put(self, tip: str, key: Tuple, body: bytes):
+        with self._lock:
+            # ответ, собранный по уже сменившейся вершине, не сохраняется
+            if tip != self._tip or len(body) > self.max_bytes:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = body
+            self._size += len(body)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._switch(None)
+
+
+class HeadersCache:
+    """
+    JSON-массив заголовков для GET /chain/headers.
+    Элементы лежат подряд в одном bytearray; при новой вершине
+    отрезаются элементы после точки расхождения и сериализуются
+    только новые заголовки.
+    """
+
+    def __init__(self):
+        self._headers = HeaderList()
+        self._height = 0
+        # элементы массива, каждый с запятой впереди, и их смещения
+        self._items = bytearray()
+        self._offsets = array("Q")
+        self._tip: Optional[str] = None
+        self._body = b"[]"
+        self._lock = threading.Lock()
+
+    def _fork_height(self, headers: HeaderList, height: int) -> int:
+        """Высота первого заголовка, которого нет в закэшированном списке"""
+        common = min(self._height, height)
+        if headers is self._headers:
+            # список только дописывается — расхождения нет
+            return common
+        while common and headers[common - 1].hash != self._headers[common - 1].hash:
+            common -= 1
+        return common
+
+    def render(self, view: ChainView) -> bytes:
+        tip = tip_key(view)
+        with self._lock:
+            if tip == self._tip:
+                CACHE_REQUESTS.inc(endpoint="headers", result="hit")
+                return self._body
+
+            fork = self._fork_height(view.headers, view.height)
+            if fork < len(self._offsets):
+                del self._items[self._offsets[fork]:]
+                del self._offsets[fork:]
+            for header in view.headers[fork:view.height]:
+                self._offsets.append(len(self._items))
+                self._items += b"," + json_bytes({
+                    "index": header.index,
+                    "previous_hash": header.previous_hash,
+                    "hash": header.hash,
+                    "merkle_root": header.merkle_root,
+                    "nonce": header.nonce,
+                    "difficulty": header.difficulty
+                })
+            HEADERS_SERIALIZED.inc(view.height - fork)
+
+            self._headers = view.headers
+            self._height = view.height
+            self._tip = tip
+            self._body = b"".join((b"[", memoryview(self._items)[1:], b"]"))
+            CACHE_REQUESTS.inc(endpoint="headers", result="miss")
+            return self._body
@@ -8,4 +8,71 @@ MY_NETWORK_ADDRESS = os.getenv("MY_NETWORK_ADDRESS", "127.0.0.1:8000")
 SEED_NODES = json.loads(os.getenv("SEED_NODES", "[]"))
 
 NODE_ADDRESS = os.getenv("NODE_ADDRESS", "NODE_0001")
-BLOCK_REWARD = 50.0
\ No newline at end of file
+BLOCK_REWARD = 50.0
+
+# Хранилище узла: "file" — журнал блоков + индексы SQLite,
+# "sqlite" — блоки, индексы, балансы и мемпул в одной базе SQLite
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "file")
+
+# Снимок состояния каждые N блоков (0 — только по запросу)
+SNAPSHOT_INTERVAL = int(os.getenv("SNAPSHOT_INTERVAL", "100"))
+# Для скольких последних блоков хранить данные отката (балансы до блока)
+UNDO_DEPTH = int(os.getenv("UNDO_DEPTH", "1000"))
+
+# Сложность — ожидаемое число хешей на блок (порог хеша 2^256 / сложность).
+# Начальная сложность — правило консенсуса: с ней идут блоки до первого
+# пересчёта, у всех узлов сети она должна совпадать.
+# 256 соответствует прежним двум hex-нулям
+INITIAL_DIFFICULTY = int(os.getenv("INITIAL_DIFFICULTY", "256"))
+# Пересчёт сложности каждые N блоков к целевому интервалу между блоками (сек)
+RETARGET_INTERVAL = int(os.getenv("RETARGET_INTERVAL", "10"))
+TARGET_BLOCK_TIME = float(os.getenv("TARGET_BLOCK_TIME", "10"))
+
+# Ленивая загрузка цепочки: при старте читаются только заголовки
+LAZY_CHAIN = os.getenv("LAZY_CHAIN", "1") == "1"
+# Сколько полных блоков держать в памяти в ленивом режиме
+BLOCK_CACHE_SIZE = int(os.getenv("BLOCK_CACHE_SIZE", "256"))
+
+# Количество процессов майнинга (1 — майнинг в текущем потоке)
+MINER_WORKERS = int(os.getenv("MINER_WORKERS", str(os.cpu_count() or 1)))
+
+# Проверка подписей транзакций при приёме и при валидации блоков
+VERIFY_SIGNATURES = os.getenv("VERIFY_SIGNATURES", "0") == "1"
+# Процессы для пакетной проверки подписей и минимальный размер пакета для пула
+SIGNATURE_WORKERS = int(os.getenv("SIGNATURE_WORKERS", str(os.cpu_count() or 1)))
+SIGNATURE_BATCH_THRESHOLD = int(os.getenv("SIGNATURE_BATCH_THRESHOLD", "64"))
+
+# Максимум транзакций в мемпуле и в одном блоке (без coinbase)
+MEMPOOL_MAX_SIZE = int(os.getenv("MEMPOOL_MAX_SIZE", "10000"))
+MAX_BLOCK_TRANSACTIONS = int(os.getenv("MAX_BLOCK_TRANSACTIONS", "1000"))
+# Максимум транзакций и байт тела в одном запросе POST /transactions/batch
+MAX_TRANSACTIONS_PER_BATCH = int(os.getenv("MAX_TRANSACTIONS_PER_BATCH", "10000"))
+MAX_BATCH_BYTES = int(os.getenv("MAX_BATCH_BYTES", str(16 * 1024 * 1024)))
+
+# Сколько блоков запрашивать у пира за один запрос при синхронизации
+SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE", "100"))
+MAX_BLOCKS_PER_REQUEST = int(os.getenv("MAX_BLOCKS_PER_REQUEST", "500"))
+
+# Таймаут запроса к пиру и максимальная пауза для недоступного пира (сек)
+PEER_TIMEOUT = float(os.getenv("PEER_TIMEOUT", "3"))
+PEER_MAX_BACKOFF = float(os.getenv("PEER_MAX_BACKOFF", "60"))
+
+# Сколько хешей помнит gossip и сколько секунд (защита от повторной рассылки)
+GOSSIP_SEEN_SIZE = int(os.getenv("GOSSIP_SEEN_SIZE", "10000"))
+GOSSIP_SEEN_TTL = float(os.getenv("GOSSIP_SEEN_TTL", "600"))
+# Максимум хешей в одном объявлении /gossip/inv
+GOSSIP_MAX_INVENTORY = int(os.getenv("GOSSIP_MAX_INVENTORY", "10000"))
+# Не чаще одной синхронизации за столько секунд по блокам, не продолжающим вершину
+GOSSIP_SYNC_INTERVAL = float(os.getenv("GOSSIP_SYNC_INTERVAL", "5"))
+
+# Проверка длинных цепочек частями в пуле процессов
+VALIDATION_WORKERS = int(os.getenv("VALIDATION_WORKERS", str(os.cpu_count() or 1)))
+VALIDATION_CHUNK_SIZE = int(os.getenv("VALIDATION_CHUNK_SIZE", "256"))
+
+# Сколько деревьев Меркла (для доказательств включения) держать в памяти
+MERKLE_CACHE_SIZE = int(os.getenv("MERKLE_CACHE_SIZE", "128"))
+
+# Готовые ответы читающих эндпоинтов для текущей вершины цепочки:
+# число записей и их суммарный размер (байт)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "4096"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
@@ -0,0 +1,186 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from models.block import Block
+from models.transaction import SignedTransaction
+from node.config import GOSSIP_MAX_INVENTORY, GOSSIP_SYNC_INTERVAL
+from node.miner import target_for_difficulty
+from node.peers import PeerClient
+from node.sync import resolve
+
+
+class SeenCache:
+    """
+    Ограниченное множество недавно виденных хешей с истечением по времени.
+    Не даёт одному и тому же объекту бесконечно ходить по сети.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: "OrderedDict[str, float]" = OrderedDict()
+
+    def _expire(self, now: float):
+        while self._items:
+            item_hash, expires = next(iter(self._items.items()))
+            if expires > now and len(self._items) <= self.max_size:
+                break
+            self._items.popitem(last=False)
+
+    def __contains__(self, item_hash: str) -> bool:
+        expires = self._items.get(item_hash)
+        return expires is not None and expires > time.monotonic()
+
+    def add(self, item_hash: str) -> bool:
+        """Запоминает хеш; False если он уже был виден"""
+        now = time.monotonic()
+        if item_hash in self:
+            return False
+
+        self._items.pop(item_hash, None)
+        self._items[item_hash] = now + self.ttl
+        self._expire(now)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class Gossip:
+    """
+    Push-распространение транзакций и блоков: пирам рассылаются только хеши
+    (inv, пачкой до GOSSIP_MAX_INVENTORY), объекты забираются у объявившего
+    узла, если они ещё не известны.
+    """
+
+    def __init__(self, peers: PeerClient, origin: str, seen: SeenCache):
+        self.peers = peers
+        self.origin = origin
+        self.seen = seen
+        # идущая синхронизация и время окончания предыдущей
+        self._sync: Optional[asyncio.Future] = None
+        self._last_sync = float("-inf")
+
+    async def announce(self, kind: str, item_hash: str, exclude: Optional[str] = None) -> int:
+        return await self.announce_many(kind, [item_hash], exclude)
+
+    async def announce_many(self, kind: str, hashes: Iterable[str], exclude: Optional[str] = None) -> int:
+        """Одно объявление на пачку хешей; возвращает число успешных рассылок"""
+        hashes = list(hashes)
+        targets = [node for node in self.peers.available_peers() if node != exclude]
+        sent = 0
+        for start in range(0, len(hashes), GOSSIP_MAX_INVENTORY):
+            chunk = hashes[start:start + GOSSIP_MAX_INVENTORY]
+            for item_hash in chunk:
+                self.seen.add(item_hash)
+            payload = {"kind": kind, "origin": self.origin}
+            # одиночный хеш — в прежнем формате, его понимают и старые узлы
+            if len(chunk) == 1:
+                payload["hash"] = chunk[0]
+            else:
+                payload["hashes"] = chunk
+            sent += await self.peers.broadcast("/gossip/inv", payload, peers=targets)
+        return sent
+
+    async def handle_inv(self, blockchain, kind: str, hashes: List[str], origin: str):
+        # объекты забираются только у известных пиров; хеш считается
+        # виденным, когда объект принят (announce), — пустое или
+        # поддельное объявление не мешает распространению настоящего
+        if origin not in self.peers.peers:
+            return
+        hashes = [item_hash for item_hash in hashes if item_hash not in self.seen]
+
+        if kind == "tx":
+            accepted = await self._receive_transactions(blockchain, hashes, origin)
+        elif kind == "block":
+            accepted = [
+                item_hash for item_hash in hashes
+                if await self._fetch_block(blockchain, item_hash, origin)
+            ]
+        else:
+            return
+
+        if accepted:
+            await self.announce_many(kind, accepted, exclude=origin)
+
+    async def _fetch_transaction(self, item_hash: str, origin: str) -> Optional[SignedTransaction]:
+        raw = await self.peers.get_json(origin, f"/gossip/tx/{item_hash}")
+        if raw is None:
+            return None
+        try:
+            tx = SignedTransaction.model_validate(raw)
+        except ValueError:
+            return None
+        return tx if tx.txid() == item_hash else None
+
+    async def _receive_transactions(self, blockchain, hashes: List[str], origin: str) -> List[str]:
+        """Недостающие транзакции забираются параллельно и принимаются одним пакетом"""
+        wanted = [item_hash for item_hash in hashes if item_hash not in blockchain.mempool]
+        fetched = await asyncio.gather(*(self._fetch_transaction(h, origin) for h in wanted))
+        txs = [tx for tx in fetched if tx is not None]
+        if not txs:
+            return []
+        errors = await run_in_threadpool(blockchain.add_transactions, txs)
+        return [tx.txid() for tx, error in zip(txs, errors) if error is None]
+
+    async def _fetch_block(self, blockchain, item_hash: str, origin: str) -> bool:
+        if blockchain.find_block_height(item_hash) is not None:
+            return False
+        raw = await self.peers.get_json(origin, f"/gossip/block/{item_hash}")
+        if raw is None:
+            return False
+        try:
+            block = Block.model_validate(raw)
+        except ValueError:
+            return False
+        if block.header.hash != item_hash:
+            return False
+        return await self.receive_block(blockchain, block, origin)
+
+    async def receive_block(self, blockchain, block: Block, origin: Optional[str] = None) -> bool:
+        """
+        Проверяет один блок относительно вершины и подключает его.
+        Если блок не продолжает нашу вершину, но выше неё — мы отстали,
+        запускается header-first синхронизация. True, только если
+        блок после этого в цепочке.
+        """
+        header = block.header
+        tip = blockchain.chain.headers[-1]
+        if header.previous_hash == tip.hash:
+            try:
+                await run_in_threadpool(blockchain.add_block, block)
+                return True
+            except ValueError:
+                return False
+
+        if header.index < len(blockchain.chain):
+            return False
+        # синхронизацию запускает только блок с настоящей работой
+        if header.compute_hash() != header.hash:
+            return False
+        if int(header.hash, 16) >= target_for_difficulty(header.difficulty):
+            return False
+
+        await self._resolve(blockchain)
+        return blockchain.find_block_height(header.hash) is not None
+
+    async def _resolve(self, blockchain) -> bool:
+        """
+        Одна синхронизация на все триггеры: пока она идёт, следующие
+        ждут её результата, после неё новая — не раньше GOSSIP_SYNC_INTERVAL
+        """
+        if self._sync is None:
+            if time.monotonic() - self._last_sync < GOSSIP_SYNC_INTERVAL:
+                return False
+            self._sync = asyncio.ensure_future(resolve(blockchain, self.peers))
+            self._sync.add_done_callback(self._sync_done)
+        # отмена одного запроса не отменяет общую синхронизацию
+        return await asyncio.shield(self._sync)
+
+    def _sync_done(self, _):
+        self._sync = None
+        self._last_sync = time.monotonic()
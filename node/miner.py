@@ -0,0 +1,223 @@
+import hashlib
+import multiprocessing as mp
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+# Как часто воркер проверяет, не найдено ли решение другим воркером
+CHECK_INTERVAL = 4096
+
+# nonce дописывается в конец хешируемой части заголовка (см. models/encoding.py)
+NONCE = struct.Struct("<Q")
+
+
+@dataclass
+class MiningResult:
+    nonce: int
+    hash: str
+    hashes: int
+    elapsed: float
+    workers: int
+
+    @property
+    def hashrate(self) -> float:
+        return self.hashes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "nonce": self.nonce,
+            "hash": self.hash,
+            "hashes": self.hashes,
+            "elapsed": self.elapsed,
+            "workers": self.workers,
+            "hashrate": self.hashrate,
+        }
+
+
+# Сложность 1 — подходит любой хеш
+MAX_TARGET = 1 << 256
+
+
+def target_for_difficulty(difficulty: int) -> int:
+    """
+    Порог хеша (как 256-битного числа); difficulty — ожидаемое число
+    хешей на блок. Прежние difficulty hex-нулей соответствуют 16 ** difficulty.
+    """
+    return MAX_TARGET // max(difficulty, 1)
+
+
+def _search(prefix, target, start, step, should_stop):
+    """
+    Перебирает nonce = start, start + step, ...
+    Префикс заголовка хешируется один раз, для каждого nonce копируется
+    только состояние sha256.
+    Возвращает (nonce, hash, hashes); nonce = None если поиск остановлен.
+    """
+    base = hashlib.sha256(prefix)
+    pack = NONCE.pack
+    nonce = start
+    hashes = 0
+
+    while not should_stop():
+        for _ in range(CHECK_INTERVAL):
+            h = base.copy()
+            h.update(pack(nonce))
+            digest = h.digest()
+            if int.from_bytes(digest, "big") < target:
+                return nonce, digest.hex(), hashes + 1
+            nonce += step
+            hashes += 1
+
+    return None, None, hashes
+
+
+def _worker_loop(worker_id, jobs, results, cancelled):
+    """
+    Процесс пула: берёт задания из своей очереди и ищет nonce,
+    пока задание не отменено (cancelled.value >= job_id).
+    """
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+
+        job_id, prefix, target, step = job
+        nonce, block_hash, hashes = _search(
+            prefix, target, worker_id, step,
+            lambda: cancelled.value >= job_id
+        )
+        if nonce is not None:
+            with cancelled.get_lock():
+                if cancelled.value < job_id:
+                    cancelled.value = job_id
+        results.put((job_id, nonce, block_hash, hashes))
+
+
+class MinerPool:
+    """
+    Пул процессов майнинга. Пространство nonce делится между воркерами
+    по модулю (воркер i проверяет i, i + N, i + 2N, ...); первый нашедший
+    решение отменяет задание у остальных.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._ctx = mp.get_context("spawn")
+        self._cancelled = self._ctx.Value("q", 0)
+        self._results = self._ctx.Queue()
+        self._jobs = []
+        self._processes = []
+        self._job_id = 0
+        self._lock = threading.Lock()
+
+    def _start(self):
+        if self._processes:
+            return
+        for worker_id in range(self.workers):
+            jobs = self._ctx.Queue()
+            process = self._ctx.Process(
+                target=_worker_loop,
+                args=(worker_id, jobs, self._results, self._cancelled),
+                daemon=True
+            )
+            process.start()
+            self._jobs.append(jobs)
+            self._processes.append(process)
+
+    def cancel(self):
+        """Отменяет текущее задание (например, пришёл новый блок)"""
+        with self._cancelled.get_lock():
+            self._cancelled.value = max(self._cancelled.value, self._job_id)
+
+    def mine(self, prefix: bytes, target: int,
+             should_stop: Optional[Callable[[], bool]] = None) -> Optional[Tuple[int, str, int]]:
+        # одновременно пул решает только одно задание
+        with self._lock:
+            self._start()
+            self._job_id += 1
+            job_id = self._job_id
+
+            for jobs in self._jobs:
+                jobs.put((job_id, prefix, target, self.workers))
+
+            # отмена могла прийти до того, как задание получило номер
+            if should_stop is not None and should_stop():
+                self.cancel()
+
+            found = None
+            total = 0
+            pending = self.workers
+            while pending:
+                result_id, nonce, block_hash, hashes = self._results.get()
+                if result_id != job_id:
+                    continue  # запоздалый ответ на старое задание
+                pending -= 1
+                total += hashes
+                if nonce is not None and found is None:
+                    found = (nonce, block_hash)
+
+            if found is None:
+                return None
+            return found[0], found[1], total
+
+    def shutdown(self):
+        self.cancel()
+        for jobs in self._jobs:
+            jobs.put(None)
+        for process in self._processes:
+            process.join(timeout=1)
+        self._jobs.clear()
+        self._processes.clear()
+
+
+_pool: Optional[MinerPool] = None
+_pool_guard = threading.Lock()
+
+
+def get_pool(workers: int) -> MinerPool:
+    global _pool
+    with _pool_guard:
+        if _pool is None or _pool.workers != workers:
+            if _pool is not None:
+                _pool.shutdown()
+            _pool = MinerPool(workers)
+        return _pool
+
+
+def cancel_mining():
+    """Прерывает текущий перебор в пуле (пришла новая вершина цепочки)"""
+    with _pool_guard:
+        pool = _pool
+    if pool is not None:
+        pool.cancel()
+
+
+def mine_header(prefix: bytes, difficulty: int, workers: int = 1,
+                should_stop: Optional[Callable[[], bool]] = None) -> Optional[MiningResult]:
+    """
+    Подбирает nonce для заголовка; prefix — хешируемая часть заголовка до nonce.
+    workers <= 1 — перебор в текущем потоке, без процессов.
+    Возвращает None, если перебор остановлен should_stop или cancel_mining.
+    """
+    target = target_for_difficulty(difficulty)
+    started = time.perf_counter()
+
+    if workers <= 1:
+        nonce, block_hash, hashes = _search(prefix, target, 0, 1, should_stop or (lambda: False))
+        if nonce is None:
+            return None
+    else:
+        found = get_pool(workers).mine(prefix, target, should_stop)
+        if found is None:
+            return None
+        nonce, block_hash, hashes = found
+
+    return MiningResult(
+        nonce=nonce,
+        hash=block_hash,
+        hashes=hashes,
+        elapsed=time.perf_counter() - started,
+        workers=max(workers, 1)
+    )
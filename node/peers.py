@@ -0,0 +1,136 @@
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+
+from node import metrics
+from node.config import PEER_TIMEOUT, PEER_MAX_BACKOFF
+
+PEER_REQUEST_SECONDS = metrics.histogram(
+    "node_peer_request_seconds", "Latency of successful requests to peers", ("peer",)
+)
+PEER_FAILURES = metrics.counter(
+    "node_peer_failures_total", "Failed requests to peers", ("peer",)
+)
+
+
+class PeerStats:
+    """Задержка (скользящее среднее) и экспоненциальная пауза для недоступного пира"""
+
+    def __init__(self):
+        self.latency: Optional[float] = None
+        self.failures = 0
+        self.backoff_until = 0.0
+        self.last_seen: Optional[float] = None
+
+    def record_success(self, elapsed: float):
+        self.latency = elapsed if self.latency is None else 0.8 * self.latency + 0.2 * elapsed
+        self.failures = 0
+        self.backoff_until = 0.0
+        self.last_seen = time.time()
+
+    def record_failure(self, max_backoff: float):
+        self.failures += 1
+        self.backoff_until = time.monotonic() + min(2 ** self.failures, max_backoff)
+
+    def is_available(self) -> bool:
+        return time.monotonic() >= self.backoff_until
+
+    def to_dict(self) -> dict:
+        return {
+            "latency": self.latency,
+            "failures": self.failures,
+            "available": self.is_available(),
+            "last_seen": self.last_seen,
+        }
+
+
+class PeerClient:
+    """
+    Асинхронный клиент для общения с пирами: один пул keep-alive
+    соединений на все запросы, параллельный опрос пиров,
+    учёт задержек и пауза для недоступных узлов.
+    """
+
+    def __init__(self, peers: Iterable[str], timeout: float = PEER_TIMEOUT,
+                 max_backoff: float = PEER_MAX_BACKOFF):
+        self.peers: List[str] = list(peers)
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.stats: Dict[str, PeerStats] = {node: PeerStats() for node in self.peers}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_keepalive_connections=max(len(self.peers), 10))
+            )
+        return self._client
+
+    def available_peers(self) -> List[str]:
+        return [node for node in self.peers if self._stats(node).is_available()]
+
+    def _stats(self, node: str) -> PeerStats:
+        return self.stats.setdefault(node, PeerStats())
+
+    async def request(self, node: str, method: str, path: str, **kwargs) -> Optional[httpx.Response]:
+        """Запрос к пиру; None если пир недоступен или ответил ошибкой"""
+        stats = self._stats(node)
+        if not stats.is_available():
+            return None
+
+        started = time.perf_counter()
+        try:
+            resp = await self._get_client().request(method, f"http://{node}{path}", **kwargs)
+        except httpx.HTTPError:
+            self._failed(node)
+            return None
+
+        if resp.status_code >= 500:
+            self._failed(node)
+            return None
+
+        elapsed = time.perf_counter() - started
+        stats.record_success(elapsed)
+        PEER_REQUEST_SECONDS.observe(elapsed, peer=node)
+        return resp if resp.status_code == 200 else None
+
+    def _failed(self, node: str):
+        self._stats(node).record_failure(self.max_backoff)
+        PEER_FAILURES.inc(peer=node)
+
+    async def get_json(self, node: str, path: str, params: Optional[dict] = None):
+        resp = await self.request(node, "GET", path, params=params)
+        if resp is None:
+            return None
+        try:
+            return resp.json()
+        except ValueError:
+            # ответ 200 не в JSON — пир сбоит, как при ошибке 5xx
+            self._failed(node)
+            return None
+
+    async def post_json(self, node: str, path: str, payload) -> Optional[httpx.Response]:
+        return await self.request(node, "POST", path, json=payload)
+
+    async def gather_json(self, path: str, peers: Optional[Iterable[str]] = None) -> Dict[str, object]:
+        """GET path у всех доступных пиров одновременно: {node: json}"""
+        nodes = list(peers) if peers is not None else self.available_peers()
+        results = await asyncio.gather(*(self.get_json(node, path) for node in nodes))
+        return {node: data for node, data in zip(nodes, results) if data is not None}
+
+    async def broadcast(self, path: str, payload, peers: Optional[Iterable[str]] = None) -> int:
+        """POST payload всем доступным пирам одновременно; возвращает число успешных"""
+        nodes = list(peers) if peers is not None else self.available_peers()
+        results = await asyncio.gather(*(self.post_json(node, path, payload) for node in nodes))
+        return sum(1 for resp in results if resp is not None)
+
+    def peer_stats(self) -> Dict[str, dict]:
+        return {node: stats.to_dict() for node, stats in self.stats.items()}
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,112 @@
+import time
+from typing import List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from models.block import Block
+from models.encoding import decode_blocks
+from node import metrics
+from node.config import SYNC_BATCH_SIZE
+from node.peers import PeerClient
+
+OCTET_STREAM = "application/octet-stream"
+
+SYNC_SECONDS = metrics.histogram(
+    "node_sync_seconds", "Duration of header-first sync with a peer", ("peer", "result")
+)
+SYNC_BLOCKS = metrics.counter(
+    "node_sync_blocks_total", "Blocks downloaded from peers during sync", ("peer",)
+)
+RESOLVES = metrics.counter(
+    "node_resolve_total", "Consensus rounds", ("result",)
+)
+
+
+async def fetch_blocks(client: PeerClient, node: str, start: int, end: int) -> Optional[List[Block]]:
+    """Блоки с высоты start (включительно) до end (не включительно)"""
+    resp = await client.request(
+        node, "GET", "/blocks",
+        params={"from": start, "to": end},
+        headers={"Accept": f"{OCTET_STREAM}, application/json;q=0.5"}
+    )
+    if resp is None:
+        return None
+
+    # старые узлы отвечают только JSON
+    if resp.headers.get("content-type", "").startswith(OCTET_STREAM):
+        return decode_blocks(resp.content)
+    return [Block.model_validate(b) for b in resp.json()]
+
+
+async def sync_with_peer(blockchain, client: PeerClient, node: str, peer_headers: List[dict]) -> bool:
+    started = time.perf_counter()
+    synced = False
+    try:
+        synced = await _sync_with_peer(blockchain, client, node, peer_headers)
+        return synced
+    finally:
+        SYNC_SECONDS.observe(
+            time.perf_counter() - started, peer=node, result="synced" if synced else "rejected"
+        )
+
+
+async def _sync_with_peer(blockchain, client: PeerClient, node: str, peer_headers: List[dict]) -> bool:
+    """
+    Header-first синхронизация: по заголовкам ищется точка расхождения,
+    затем пачками скачиваются только недостающие блоки, каждая пачка
+    проверяется относительно уже проверенной части ветки,
+    и ветка подключается через reorganize.
+    """
+    peer_length = len(peer_headers)
+    if peer_length <= len(blockchain.chain):
+        return False
+
+    fork = blockchain.find_fork_point([h["hash"] for h in peer_headers])
+    if fork == 0:
+        return False
+
+    branch: List[Block] = []
+    for start in range(fork, peer_length, SYNC_BATCH_SIZE):
+        end = min(start + SYNC_BATCH_SIZE, peer_length)
+        batch = await fetch_blocks(client, node, start, end)
+        if batch is None or len(batch) != end - start:
+            return False
+
+        # проверяем пачку, продолжая уже проверенную часть ветки
+        valid = await run_in_threadpool(
+            blockchain.validate_branch, fork, branch + batch, len(branch)
+        )
+        if not valid:
+            return False
+        branch.extend(batch)
+        SYNC_BLOCKS.inc(len(batch), peer=node)
+
+    # правило самой длинной цепочки проверяем ещё раз: за время загрузки
+    # локальная цепочка могла вырасти
+    if fork + len(branch) <= len(blockchain.chain):
+        return False
+
+    await run_in_threadpool(blockchain.reorganize, fork, branch)
+    return True
+
+
+async def resolve(blockchain, client: PeerClient) -> bool:
+    """Опрашивает заголовки всех пиров параллельно и синхронизируется с самым длинным"""
+    all_headers = await client.gather_json("/chain/headers")
+
+    candidates = [
+        (len(headers), node, headers)
+        for node, headers in all_headers.items()
+        if isinstance(headers, list) and len(headers) > len(blockchain.chain)
+    ]
+
+    for _, node, headers in sorted(candidates, key=lambda c: c[0], reverse=True):
+        try:
+            if await sync_with_peer(blockchain, client, node, headers):
+                RESOLVES.inc(result="replaced")
+                return True
+        except (ValueError, KeyError, TypeError):
+            continue
+
+    RESOLVES.inc(result="kept")
+    return False
@@ -1,28 +1,285 @@
 import json
 import os
-from models.block import Block
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from blockstore import BlockStore
+from chain_index import ChainIndex, UndoData
+from models.block import Block, BlockHeader
+from models.compact import HeaderList
+from models import encoding
 from models.transaction import SignedTransaction
+from node import metrics
+from node.config import STORAGE_BACKEND
 
 DATA_DIR = "data"
+# старый формат: вся цепочка одним JSON, читается только для миграции
 CHAIN_FILE = os.path.join(DATA_DIR, "blockchain.json")
+BLOCKS_DIR = os.path.join(DATA_DIR, "blocks")
+INDEX_FILE = os.path.join(DATA_DIR, "index.sqlite")
+SQLITE_FILE = os.path.join(DATA_DIR, "chain.sqlite")
+SNAPSHOT_FILE = os.path.join(DATA_DIR, "state.snapshot")
 
+_storage = None
 
-def save_chain(chain):
-    os.makedirs(DATA_DIR, exist_ok=True)
+STORAGE_WRITE_SECONDS = metrics.histogram(
+    "node_storage_write_seconds", "Time to persist connected blocks", ("backend",)
+)
+STORAGE_WRITE_BYTES = metrics.counter(
+    "node_storage_write_bytes_total", "Encoded block bytes written to storage", ("backend",)
+)
 
-    with open(CHAIN_FILE, "w", encoding="utf-8") as f:
-        json.dump(
-            [block.model_dump() for block in chain],
-            f,
-            indent=2
-        )
 
+# Запись блока: байт формата + бинарный блок (models/encoding.py),
+# заголовок фиксированной длины стоит в начале записи.
+RECORD_BINARY = b"\x01"
+# Старый формат: JSON заголовка, перевод строки, JSON списка транзакций
+# (или JSON блока целиком). Записи такого вида по-прежнему читаются.
+HEADER_SEPARATOR = b"\n"
+
+
+def encode_block(block: Block) -> bytes:
+    return RECORD_BINARY + encoding.encode_block(block)
+
+
+def decode_block(payload: bytes) -> Block:
+    if payload[:1] == RECORD_BINARY:
+        return encoding.decode_block(memoryview(payload)[1:], trusted=True)
+
+    header, sep, transactions = payload.partition(HEADER_SEPARATOR)
+    if not sep:
+        return Block.model_validate_json(payload)
+
+    return Block(
+        header=BlockHeader.model_validate_json(header),
+        transactions=json.loads(transactions)
+    )
+
+
+def decode_header(payload: bytes) -> BlockHeader:
+    if payload[:1] == RECORD_BINARY:
+        return encoding.decode_header(memoryview(payload)[1:], trusted=True)
+    if payload.startswith(b'{"header"'):
+        return Block.model_validate_json(payload).header
+    return BlockHeader.model_validate_json(payload)
+
+
+def header_record(head: bytes) -> bytes:
+    """Закодированный заголовок (encoding.encode_header) из начала записи блока"""
+    if head[:1] == RECORD_BINARY:
+        return bytes(head[1:1 + encoding.HEADER_SIZE])
+    return encoding.encode_header(decode_header(head))
+
+
+def _read_head(store: BlockStore, height: int) -> bytes:
+    head = store.read_prefix(height, len(RECORD_BINARY) + encoding.HEADER_SIZE)
+    if head[:1] != RECORD_BINARY:
+        head = store.read_until(height, HEADER_SEPARATOR)
+    return head
+
+
+def _read_header(store: BlockStore, height: int) -> BlockHeader:
+    return decode_header(_read_head(store, height))
+
+
+class ChainStorage:
+    """
+    Хранилище узла за Blockchain: блоки, индексы, балансы и мемпул.
+    Подключение блоков (с заменой хвоста при реорганизации) —
+    одна операция, чтобы реализация могла выполнить её атомарно.
+    """
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    # -------------------------
+    # БЛОКИ
+    # -------------------------
+
+    def load_headers(self) -> HeaderList:
+        raise NotImplementedError
+
+    def read_block(self, height: int) -> Block:
+        raise NotImplementedError
+
+    def iter_blocks(self, start: int = 0) -> Iterator[Block]:
+        raise NotImplementedError
+
+    def connect_blocks(self, start_height: int, blocks: List[Block],
+                       balances: Optional[Dict[str, Optional[float]]] = None,
+                       undo: Optional[List[UndoData]] = None):
+        """
+        Заменяет блоки с высоты start_height на blocks.
+        balances — новые значения затронутых балансов после подключения
+        (None — адрес удалён из состояния),
+        undo — данные отката каждого блока (балансы до него).
+        """
+        raise NotImplementedError
+
+    def connect_block(self, height: int, block: Block,
+                      balances: Optional[Dict[str, Optional[float]]] = None,
+                      undo: Optional[UndoData] = None):
+        self.connect_blocks(height, [block], balances, None if undo is None else [undo])
+
+    def load_undo(self, start_height: int) -> List[Optional[UndoData]]:
+        """Данные отката блоков с высоты start_height; None там, где их нет"""
+        return []
+
+    # -------------------------
+    # ИНДЕКСЫ
+    # -------------------------
+
+    def block_height(self, block_hash: str) -> Optional[int]:
+        raise NotImplementedError
+
+    def tx_location(self, txid: str) -> Optional[Tuple[int, int]]:
+        raise NotImplementedError
+
+    def address_transactions(self, address: str, offset: int = 0, limit: int = 50,
+                             below: Optional[int] = None):
+        raise NotImplementedError
+
+    def address_transaction_count(self, address: str, below: Optional[int] = None) -> int:
+        raise NotImplementedError
 
-def load_chain():
-    if not os.path.exists(CHAIN_FILE):
+    # -------------------------
+    # СОСТОЯНИЕ И МЕМПУЛ
+    # -------------------------
+
+    def load_balances(self) -> Optional[Dict[str, float]]:
+        """Балансы на вершине цепочки или None, если их нужно пересчитать по блокам"""
         return None
 
+    def store_balances(self, balances: Dict[str, float]):
+        """Сохраняет балансы, пересчитанные по цепочке"""
+        pass
+
+    def load_mempool(self) -> List[SignedTransaction]:
+        return []
+
+    def add_mempool(self, txid: str, tx: SignedTransaction):
+        pass
+
+    def add_mempool_many(self, items: Iterable[Tuple[str, SignedTransaction]]):
+        """Пары (txid, tx), принятые одним пакетом"""
+        for txid, tx in items:
+            self.add_mempool(txid, tx)
+
+    def remove_mempool(self, txids: Iterable[str]):
+        pass
+
+    def close(self):
+        pass
+
+
+class FileStorage(ChainStorage):
+    """
+    Блоки в сегментированном журнале (blockstore.py), индексы в SQLite.
+    Балансы пересчитываются по цепочке при старте, мемпул не сохраняется.
+    """
+
+    def __init__(self, blocks_dir: str = BLOCKS_DIR, index_file: str = INDEX_FILE):
+        os.makedirs(os.path.dirname(index_file) or ".", exist_ok=True)
+        self.store = BlockStore(blocks_dir)
+        self.index = ChainIndex(index_file)
+        self._catch_up_index()
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def load_headers(self) -> HeaderList:
+        return HeaderList.from_records(
+            header_record(_read_head(self.store, height)) for height in range(len(self.store))
+        )
+
+    def read_block(self, height: int) -> Block:
+        return decode_block(self.store.read(height))
+
+    def iter_blocks(self, start: int = 0) -> Iterator[Block]:
+        for payload in self.store.iter_records(start):
+            yield decode_block(payload)
+
+    def connect_blocks(self, start_height: int, blocks: List[Block],
+                       balances: Optional[Dict[str, Optional[float]]] = None,
+                       undo: Optional[List[UndoData]] = None):
+        records = [encode_block(block) for block in blocks]
+        started = time.perf_counter()
+        if start_height < len(self.store):
+            self.store.truncate(start_height)
+            self.index.disconnect_from(start_height)
+        for record in records:
+            self.store.append(record)
+        self.index.connect_blocks(start_height, blocks, undo)
+        STORAGE_WRITE_SECONDS.observe(time.perf_counter() - started, backend="file")
+        STORAGE_WRITE_BYTES.inc(sum(map(len, records)), backend="file")
+
+    def _catch_up_index(self, batch: int = 500):
+        """Доиндексирует блоки, записанные в журнал, но не попавшие в индекс (падение)"""
+        height = len(self.store)
+        indexed = self.index.indexed_height()
+        if indexed > 0:
+            # индекс мог остаться от другой ветки
+            tip = min(indexed, height) - 1
+            if tip < 0 or self.index.block_height(_read_header(self.store, tip).hash) != tip:
+                indexed = 0
+        indexed = min(indexed, height)
+        self.index.disconnect_from(indexed)
+
+        pending = []
+        for block in self.iter_blocks(indexed):
+            pending.append(block)
+            if len(pending) >= batch:
+                self.index.connect_blocks(indexed, pending)
+                indexed += len(pending)
+                pending = []
+        if pending:
+            self.index.connect_blocks(indexed, pending)
+
+    def load_undo(self, start_height: int) -> List[Optional[UndoData]]:
+        return self.index.load_undo(start_height)
+
+    def block_height(self, block_hash: str) -> Optional[int]:
+        return self.index.block_height(block_hash)
+
+    def tx_location(self, txid: str) -> Optional[Tuple[int, int]]:
+        return self.index.tx_location(txid)
+
+    def address_transactions(self, address: str, offset: int = 0, limit: int = 50,
+                             below: Optional[int] = None):
+        return self.index.address_transactions(address, offset, limit, below)
+
+    def address_transaction_count(self, address: str, below: Optional[int] = None) -> int:
+        return self.index.address_transaction_count(address, below)
+
+    def close(self):
+        self.store.close_maps()
+        self.index.close()
+
+
+def _load_legacy_chain():
     with open(CHAIN_FILE, "r", encoding="utf-8") as f:
         raw = json.load(f)
 
     return [Block.model_validate(b) for b in raw]
+
+
+def open_storage(backend: str = STORAGE_BACKEND) -> ChainStorage:
+    if backend == "sqlite":
+        from sqlite_storage import SQLiteStorage
+        os.makedirs(DATA_DIR, exist_ok=True)
+        storage = SQLiteStorage(SQLITE_FILE)
+    elif backend == "file":
+        storage = FileStorage()
+    else:
+        raise ValueError(f"Unknown storage backend: {backend}")
+
+    if not len(storage) and os.path.exists(CHAIN_FILE):
+        storage.connect_blocks(0, _load_legacy_chain())
+    return storage
+
+
+def get_storage() -> ChainStorage:
+    global _storage
+    if _storage is None:
+        _storage = open_storage()
+    return _storage
@@ -0,0 +1,188 @@
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from chain_index import ChainIndex, UndoData
+from models import encoding
+from models.block import Block
+from models.compact import HeaderList
+from models.transaction import SignedTransaction
+from persistence import (
+    ChainStorage, RECORD_BINARY, STORAGE_WRITE_BYTES, STORAGE_WRITE_SECONDS,
+    decode_block, encode_block, header_record
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS block_data (
+    height INTEGER PRIMARY KEY,
+    record BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS balances (
+    address TEXT PRIMARY KEY,
+    balance REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS mempool (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    txid TEXT NOT NULL UNIQUE,
+    tx BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# для какой высоты сохранены балансы; -1 — нужно пересчитать
+STATE_HEIGHT = "state_height"
+
+
+class SQLiteStorage(ChainIndex, ChainStorage):
+    """
+    Всё состояние узла в одной базе SQLite (WAL):
+    записи блоков, индексы, балансы и мемпул.
+    Блоки, индексы и изменённые балансы пишутся одной транзакцией,
+    поэтому после падения база соответствует целому числу блоков.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(height) FROM block_data").fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    # -------------------------
+    # БЛОКИ
+    # -------------------------
+
+    def load_headers(self) -> HeaderList:
+        # заголовок фиксированной длины стоит в начале записи — тело не читается
+        size = len(RECORD_BINARY) + encoding.HEADER_SIZE
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT substr(record, 1, ?) FROM block_data ORDER BY height", (size,)
+            ).fetchall()
+        return HeaderList.from_records(header_record(bytes(row[0])) for row in rows)
+
+    def read_block(self, height: int) -> Block:
+        if height < 0:
+            height += len(self)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM block_data WHERE height = ?", (height,)
+            ).fetchone()
+        if row is None:
+            raise IndexError(height)
+        return decode_block(row[0])
+
+    def iter_blocks(self, start: int = 0, batch: int = 256) -> Iterator[Block]:
+        # читаем пачками, чтобы не держать блокировку на всё время обхода
+        height = start
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT record FROM block_data WHERE height >= ? "
+                    "ORDER BY height LIMIT ?", (height, batch)
+                ).fetchall()
+            for row in rows:
+                yield decode_block(row[0])
+            if len(rows) < batch:
+                return
+            height += batch
+
+    def connect_blocks(self, start_height: int, blocks: List[Block],
+                       balances: Optional[Dict[str, Optional[float]]] = None,
+                       undo: Optional[List[UndoData]] = None):
+        included = [tx.txid() for block in blocks for tx in block.transactions]
+        records = [(start_height + offset, encode_block(block)) for offset, block in enumerate(blocks)]
+        started = time.perf_counter()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM block_data WHERE height >= ?", (start_height,))
+            self._unindex_from(start_height)
+            self._conn.executemany(
+                "INSERT INTO block_data (height, record) VALUES (?, ?)", records
+            )
+            self._index_blocks(start_height, blocks, undo)
+            self._conn.executemany(
+                "DELETE FROM mempool WHERE txid = ?", [(txid,) for txid in included]
+            )
+
+            if balances is None:
+                self._set_meta(STATE_HEIGHT, -1)
+            else:
+                self._write_balances(balances)
+                self._set_meta(STATE_HEIGHT, start_height + len(blocks))
+
+        STORAGE_WRITE_SECONDS.observe(time.perf_counter() - started, backend="sqlite")
+        STORAGE_WRITE_BYTES.inc(sum(len(record) for _, record in records), backend="sqlite")
+
+    # -------------------------
+    # СОСТОЯНИЕ
+    # -------------------------
+
+    def _set_meta(self, key: str, value: int):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def _write_balances(self, balances: Dict[str, Optional[float]]):
+        # None — адрес удалён из состояния откатом блока
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO balances (address, balance) VALUES (?, ?)",
+            [(address, balance) for address, balance in balances.items() if balance is not None]
+        )
+        self._conn.executemany(
+            "DELETE FROM balances WHERE address = ?",
+            [(address,) for address, balance in balances.items() if balance is None]
+        )
+
+    def load_balances(self) -> Optional[Dict[str, float]]:
+        height = len(self)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (STATE_HEIGHT,)
+            ).fetchone()
+            if row is None or row[0] != height:
+                return None
+            rows = self._conn.execute("SELECT address, balance FROM balances").fetchall()
+        return dict(rows)
+
+    def store_balances(self, balances: Dict[str, float]):
+        """Полная перезапись балансов (после пересчёта по цепочке)"""
+        height = len(self)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM balances")
+            self._write_balances(balances)
+            self._set_meta(STATE_HEIGHT, height)
+
+    # -------------------------
+    # МЕМПУЛ
+    # -------------------------
+
+    def load_mempool(self) -> List[SignedTransaction]:
+        with self._lock:
+            rows = self._conn.execute("SELECT tx FROM mempool ORDER BY seq").fetchall()
+        return [encoding.decode_transaction(row[0], trusted=True) for row in rows]
+
+    def add_mempool(self, txid: str, tx: SignedTransaction):
+        self.add_mempool_many([(txid, tx)])
+
+    def add_mempool_many(self, items: Iterable[Tuple[str, SignedTransaction]]):
+        # пакет записывается одной транзакцией SQLite
+        rows = [(txid, encoding.encode_transaction(tx)) for txid, tx in items]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO mempool (txid, tx) VALUES (?, ?)", rows
+            )
+
+    def remove_mempool(self, txids: Iterable[str]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM mempool WHERE txid = ?", [(txid,) for txid in txids]
+            )
@@ -1,3 +1,4 @@
 from models.core import Blockchain
+from node.config import INITIAL_DIFFICULTY
 
-blockchain = Blockchain(difficulty=2)
+blockchain = Blockchain(difficulty=INITIAL_DIFFICULTY)
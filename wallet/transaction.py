@@ -1,8 +1,9 @@
 import hashlib
 import json
 import time
-from ecdsa import SigningKey, VerifyingKey, SECP256k1
-from ecdsa.util import sigencode_der, sigdecode_der
+from ecdsa import SigningKey, SECP256k1
+from ecdsa.util import sigencode_der
+from models.signatures import verify_payload
 
 class Transaction:
     def __init__(self, sender: str, receiver : str, amount: float, timestamp: float = None):
@@ -44,19 +45,13 @@ class Transaction:
         if not self.signature:
             return False
 
-        try:
-            # Предполагаем, что sender — это hex несжатого публичного ключа (начинается с 04)
-            pubkey_bytes = bytes.fromhex(self.sender)
-            vk = VerifyingKey.from_string(pubkey_bytes, curve=SECP256k1)
-
-            sig_bytes = bytes.fromhex(self.signature)
-            message = json.dumps(self.to_dict(), sort_keys=True).encode()
-            hash_bytes = hashlib.sha256(message).digest()
+        message = json.dumps(self.to_dict(), sort_keys=True).encode()
+        hash_bytes = hashlib.sha256(message).digest()
 
-            return vk.verify(sig_bytes, hash_bytes, hashfunc=hashlib.sha256, sigdecode=sigdecode_der)
-        except Exception as e:
-            print(f"Ошибка проверки подписи: {e}")
-            return False
+        # ecdsa verify(..., hashfunc=sha256) хеширует hash_bytes ещё раз —
+        # это ровно ECDSA(SHA256) над hash_bytes; проверка идёт через OpenSSL
+        # с кэшем разобранных публичных ключей
+        return verify_payload(self.sender, self.signature, hash_bytes)
 
     def to_dict_with_signature(self) -> dict:
         """Для отправки в сеть — с подписью"""